@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Come i main.py degli esercizi: il pacchetto si importa dalla radice del repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
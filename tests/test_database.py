@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from vision_engine.database import DEFAULT_USER, DatabaseProgressStore, SessionDatabase
+from vision_engine.progress import ProgressStore
+from vision_engine.records import RoundRecord
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = SessionDatabase(str(tmp_path / "sessions.db"))
+    yield database
+    database.close()
+
+
+def make_record(timestamp, hits=2, **fields):
+    return RoundRecord(timestamp, 1.0, 3, 6, hits, 0, **fields)
+
+
+def test_history_is_kept_per_user_and_exercise(database):
+    database.add_rounds("anna", "lettere", [make_record(2.0), make_record(1.0, hits=3)])
+    database.add_rounds("bruno", "lettere", [make_record(3.0)])
+    database.add_rounds("anna", "parole", [make_record(4.0)])
+
+    history = database.history("anna", "lettere")
+    assert [history[i].timestamp for i in range(len(history))] == [1.0, 2.0]
+    assert history[0].hits == 3
+    assert len(database.history("nessuno", "lettere")) == 0
+    assert database.summary("anna")["lettere"]["rounds"] == 2
+
+
+def test_store_sees_rounds_not_yet_written(database):
+    store = DatabaseProgressStore(database, "anna", "lettere")
+    record = make_record(1.0, click_times=(0.5,), plan_round=3, plan_id=7)
+    store.remember(record)
+    assert len(store) == 1
+    store.write([record])
+
+    loaded = DatabaseProgressStore(database, "anna", "lettere")[-1]
+    assert list(loaded.click_times) == [0.5]
+    assert (loaded.plan_round, loaded.plan_id) == (3, 7)
+
+
+def test_legacy_progress_is_imported_once_without_writing_files(database, tmp_path):
+    folder = tmp_path / "lettere"
+    folder.mkdir()
+    legacy_path = folder / "progress.json"
+    legacy_path.write_text(json.dumps({"progressi": [
+        {"time-stamp": "10/06/24 00:20", "score": "1/3"},
+        {"time-stamp": "09/06/24 10:00", "score": "2/3"},
+    ]}))
+
+    def store():
+        legacy = ProgressStore(str(folder / "progress.bin"), str(legacy_path))
+        return DatabaseProgressStore(database, DEFAULT_USER, "lettere", legacy)
+
+    records = store().load()
+    assert [record.hits for record in records] == [2, 1]
+    assert len(store()) == 2
+    assert sorted(path.name for path in folder.iterdir()) == ["progress.json"]
@@ -0,0 +1,95 @@
+import json
+import random
+import zipfile
+
+import pytest
+
+from vision_engine.launcher import load_provider
+from vision_engine.packs import PackError, PackLibrary, StimulusPack, build_pack
+
+
+@pytest.fixture
+def glyph_pack(tmp_path):
+    source = tmp_path / "cirillico.txt"
+    source.write_text("Ж\nЖ\n\n Я \nБ\n", encoding="utf-8")
+    path = tmp_path / "packs" / "cirillico.zip"
+    path.parent.mkdir()
+    build_pack(str(path), "lettere", str(source), title="Cirillico", font=("DejaVu Sans", 40))
+    return path
+
+
+def test_glyph_pack_manifest_and_items(glyph_pack):
+    pack = StimulusPack(str(glyph_pack))
+    try:
+        assert (pack.name, pack.exercise, pack.title, pack.count) == ("cirillico", "lettere", "Cirillico", 3)
+        assert pack.font == ("DejaVu Sans", 40)
+        assert pack.items() == ["Ж", "Я", "Б"]
+    finally:
+        pack.close()
+
+
+def test_items_are_read_only_when_asked(glyph_pack):
+    pack = StimulusPack(str(glyph_pack))
+    try:
+        assert pack._items is None
+        pack.items()
+        assert pack._items is not None
+    finally:
+        pack.close()
+
+
+def test_image_pack_reads_single_members(tmp_path):
+    images = tmp_path / "foto"
+    images.mkdir()
+    for name in ("b.png", "a.jpg", ".nascosta.png", "note.txt"):
+        (images / name).write_bytes(name.encode())
+    path = tmp_path / "foto.zip"
+    assert build_pack(str(path), "immagini", str(images)) == 2
+
+    pack = StimulusPack(str(path))
+    try:
+        manifest = pack.manifest()
+        assert manifest.files == ["a.jpg", "b.png"]
+        assert "b.png" in manifest and "note.txt" not in manifest
+        assert manifest.source("b.png").open().read() == b"b.png"
+        assert manifest.stamp("a.jpg") != manifest.stamp("b.png")
+        assert sorted(manifest.sample(2, rng=random.Random(0))) == ["a.jpg", "b.png"]
+        with pytest.raises(ValueError):
+            manifest.sample(2, exclude=["a.jpg"])
+    finally:
+        pack.close()
+
+
+def test_invalid_archives_are_rejected(tmp_path):
+    not_zip = tmp_path / "rotto.zip"
+    not_zip.write_bytes(b"not a zip")
+    unknown = tmp_path / "sconosciuto.zip"
+    with zipfile.ZipFile(unknown, "w") as archive:
+        archive.writestr("pack.json", json.dumps({"exercise": "suoni"}))
+    for path in (not_zip, unknown):
+        with pytest.raises(PackError):
+            StimulusPack(str(path))
+
+
+def test_library_lists_valid_packs_by_exercise(glyph_pack, capsys):
+    (glyph_pack.parent / "rotto.zip").write_bytes(b"not a zip")
+    library = PackLibrary(str(glyph_pack.parent))
+    assert [pack.name for pack in library.packs("lettere")] == ["cirillico"]
+    assert library.packs("parole") == []
+    assert library.get("cirillico.zip") is library.get("cirillico")
+    assert "rotto" in capsys.readouterr().err
+
+
+def test_letter_provider_follows_the_pack(tmp_path):
+    source = tmp_path / "glifi.txt"
+    source.write_text("\n".join(chr(0x4E00 + i) for i in range(150)), encoding="utf-8")
+    path = tmp_path / "glifi.zip"
+    build_pack(str(path), "lettere", str(source))
+    pack = StimulusPack(str(path))
+    try:
+        provider = load_provider("lettere", pack)
+        assert len(provider.vocabulary()) == 150
+        assert provider.max_items() == 100
+        assert set(provider.draw_initial(5)) <= set(pack.items())
+    finally:
+        pack.close()
@@ -0,0 +1,45 @@
+import itertools
+import random
+
+import pytest
+
+from vision_engine.placement import GridPlacer, PlacementError
+
+
+def test_capacity_counts_whole_cells():
+    placer = GridPlacer(1920, 1080, item_width=60, item_height=70, gap=30)
+    assert placer.columns == (1920 - 200) // 90
+    assert placer.rows == (1080 - 200) // 100
+    assert placer.capacity == placer.columns * placer.rows
+
+
+def test_capacity_is_zero_when_items_do_not_fit():
+    placer = GridPlacer(300, 300, item_width=200, item_height=200, gap=10)
+    assert placer.capacity == 0
+    with pytest.raises(PlacementError):
+        placer.place(1)
+
+
+def test_places_up_to_capacity_and_no_more():
+    placer = GridPlacer(800, 600, item_width=60, item_height=70, gap=30)
+    assert len(placer.place(placer.capacity, random.Random(0))) == placer.capacity
+    with pytest.raises(PlacementError):
+        placer.place(placer.capacity + 1)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_items_keep_the_minimum_gap(seed):
+    item_width, item_height, gap = 60, 70, 30
+    placer = GridPlacer(1000, 700, item_width, item_height, gap)
+    positions = placer.place(placer.capacity, random.Random(seed))
+    for (x1, y1), (x2, y2) in itertools.combinations(positions, 2):
+        # Centri: due rettangoli distano almeno `gap` in x o in y (a meno
+        # dell'arrotondamento a pixel interi)
+        assert abs(x1 - x2) >= item_width + gap - 1 or abs(y1 - y2) >= item_height + gap - 1
+
+
+def test_items_stay_inside_the_margin():
+    placer = GridPlacer(1000, 700, 60, 70, gap=30, margin=100)
+    for x, y in placer.place(placer.capacity, random.Random(1)):
+        assert 100 + 60 / 2 - 1 <= x <= 1000 - 100 - 60 / 2 + 1
+        assert 100 + 70 / 2 - 1 <= y <= 700 - 100 - 70 / 2 + 1
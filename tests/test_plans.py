@@ -0,0 +1,81 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from vision_engine.display import VirtualDisplay
+from vision_engine.launcher import load_provider
+from vision_engine.plans import SessionPlan, generate_plan, write_plan
+
+
+@pytest.fixture
+def provider():
+    return load_provider("lettere")
+
+
+def make_plan(provider, path, seed=42, rounds=20, display=None):
+    display = display or VirtualDisplay(1280, 720)
+    vocabulary, plan = generate_plan(provider, rounds, 4, 9, seed, display)
+    write_plan(str(path), provider.name, vocabulary, plan, seed, display)
+    return vocabulary, plan, SessionPlan(str(path))
+
+
+def test_rounds_read_back_as_generated(provider, tmp_path):
+    vocabulary, plan, session = make_plan(provider, tmp_path / "plan.bin")
+    try:
+        assert len(session) == 20
+        assert (session.exercise, session.seed, session.num_initial, session.num_final) == ("lettere", 42, 4, 9)
+        assert session.display_size == (1280, 720)
+        for index in (0, 7, -1):
+            plan_round = session[index]
+            expected = plan[index]
+            assert plan_round.index == index % 20
+            assert plan_round.items_initial == [vocabulary[i] for i in expected["initial"]]
+            assert plan_round.items_final == [vocabulary[i] for i in expected["final"]]
+            assert plan_round.positions == [tuple(map(int, xy)) for xy in expected["positions"]]
+        with pytest.raises(IndexError):
+            session[20]
+    finally:
+        session.close()
+
+
+def test_rounds_are_consistent(provider, tmp_path):
+    _, _, session = make_plan(provider, tmp_path / "plan.bin")
+    try:
+        for plan_round in session:
+            assert len(set(plan_round.items_final)) == 9
+            assert set(plan_round.items_initial) <= set(plan_round.items_final)
+    finally:
+        session.close()
+
+
+def test_same_seed_same_plan_and_identity(provider, tmp_path):
+    _, _, first = make_plan(provider, tmp_path / "a.bin")
+    _, _, second = make_plan(provider, tmp_path / "b.bin")
+    _, _, other = make_plan(provider, tmp_path / "c.bin", seed=43)
+    try:
+        assert [r.items_initial for r in first] == [r.items_initial for r in second]
+        assert first.plan_id == second.plan_id != 0
+        assert other.plan_id != first.plan_id
+    finally:
+        for session in (first, second, other):
+            session.close()
+
+
+def test_positions_only_on_the_planned_screen(provider, tmp_path):
+    display = VirtualDisplay(1280, 720)
+    _, _, session = make_plan(provider, tmp_path / "plan.bin", display=display)
+    try:
+        plan_round = session[0]
+        placer = provider.placer(display, plan_round.items_initial)
+        assert session.positions_for(plan_round, display, placer) == plan_round.positions
+        other = VirtualDisplay(1920, 1080)
+        assert session.positions_for(plan_round, other, provider.placer(other, plan_round.items_initial)) is None
+    finally:
+        session.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "plan.bin"
+    path.write_bytes(b"not a plan at all")
+    with pytest.raises(ValueError):
+        SessionPlan(str(path))
@@ -0,0 +1,88 @@
+import json
+import math
+import os
+import struct
+
+import pytest
+
+from vision_engine.progress import MAGIC, ProgressStore
+from vision_engine.records import COLUMNS, RoundRecord
+
+
+def make_record(timestamp, **fields):
+    values = dict(display_time=1.5, n_initial=4, n_final=8, hits=3, false_alarms=1,
+                  submit_time=2.25, click_times=(0.5, 1.25, 2.0))
+    values.update(fields)
+    return RoundRecord(timestamp, **values)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ProgressStore(str(tmp_path / "progress.bin"), str(tmp_path / "progress.json"))
+
+
+def reopen(store):
+    return ProgressStore(store.path, store.legacy_path)
+
+
+def test_round_trip(store):
+    records = [make_record(1000.0), make_record(2000.0, click_times=(), plan_round=7, plan_id=42)]
+    store.write(records)
+
+    loaded = reopen(store).load()
+    assert len(loaded) == 2
+    first, second = loaded
+    assert (first.timestamp, first.display_time, first.n_initial, first.n_final) == (1000.0, 1.5, 4, 8)
+    assert (first.hits, first.false_alarms, first.submit_time) == (3, 1, 2.25)
+    assert list(first.click_times) == [0.5, 1.25, 2.0]
+    assert math.isnan(first.exposure_time)
+    assert first.plan_round == -1
+    assert list(second.click_times) == []
+    assert (second.plan_round, second.plan_id) == (7, 42)
+
+
+def test_appends_across_sessions(store):
+    store.append(make_record(1000.0))
+    again = reopen(store)
+    again.append(make_record(2000.0, click_times=(3.0,)))
+    loaded = reopen(store).load()
+    assert [record.timestamp for record in loaded] == [1000.0, 2000.0]
+    assert list(loaded[1].click_times) == [3.0]
+
+
+def test_truncated_trailing_row_is_ignored_and_overwritten(store):
+    store.write([make_record(1000.0), make_record(2000.0)])
+    with open(store.path, "r+b") as file:
+        file.truncate(os.path.getsize(store.path) - 5)
+
+    again = reopen(store)
+    assert [record.timestamp for record in again.load()] == [1000.0]
+    again.write([make_record(3000.0)])
+    assert [record.timestamp for record in reopen(store).load()] == [1000.0, 3000.0]
+
+
+def test_old_columns_are_read_with_defaults_and_upgraded(store):
+    # Un file scritto prima di submit_time, dei tempi misurati e dei piani
+    old_columns = [column for column in COLUMNS if column[0] in
+                   ("timestamp", "display_time", "n_initial", "n_final", "hits", "false_alarms",
+                    "click_offset", "click_count")]
+    header = json.dumps({"columns": old_columns}).encode("utf-8")
+    row = struct.Struct("<" + "".join(code for _, code in old_columns))
+    with open(store.path, "wb") as file:
+        file.write(MAGIC + struct.pack("<H", len(header)) + header)
+        file.write(row.pack(1000.0, 2.0, 5, 10, 4, 0, 0, 0))
+    open(store.clicks_path, "wb").close()
+
+    old = reopen(store).load()[0]
+    assert (old.timestamp, old.display_time, old.n_initial, old.hits) == (1000.0, 2.0, 5, 4)
+    assert math.isnan(old.submit_time)
+    assert (old.plan_round, old.plan_id) == (-1, 0)
+
+    upgraded = reopen(store)
+    upgraded.write([make_record(2000.0)])
+    with open(store.path, "rb") as file:
+        columns, _ = upgraded._read_header(file.read(6), file)
+    assert columns == [tuple(column) for column in COLUMNS]
+    loaded = reopen(store).load()
+    assert [record.timestamp for record in loaded] == [1000.0, 2000.0]
+    assert list(loaded[1].click_times) == [0.5, 1.25, 2.0]
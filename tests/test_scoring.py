@@ -0,0 +1,19 @@
+from vision_engine.scoring import score_round
+
+
+def test_counts_only_selected_initial_items():
+    assert score_round(["A", "B", "C"], ["B", "X", "C"]) == ["B", "C"]
+
+
+def test_keeps_selection_order():
+    assert score_round(["A", "B", "C"], ["C", "A"]) == ["C", "A"]
+
+
+def test_empty_selection_scores_nothing():
+    assert score_round(["A", "B"], []) == []
+
+
+def test_false_alarms_are_the_rest_of_the_selection():
+    selected = ["D", "A", "E"]
+    correct = score_round(["A", "B"], selected)
+    assert len(selected) - len(correct) == 2
@@ -0,0 +1,55 @@
+from vision_engine.selection import SelectionModel
+
+
+def make_model(items=("A", "B", "C", "D")):
+    model = SelectionModel(items)
+    changes = []
+    model.subscribe(changes.append)
+    return model, changes
+
+
+def test_toggle_notifies_the_changed_index():
+    model, changes = make_model()
+    model.toggle(2)
+    model.toggle(2)
+    assert changes == [[2], [2]]
+    assert not model.is_selected(2)
+
+
+def test_set_many_notifies_only_real_changes():
+    model, changes = make_model()
+    model.toggle(1)
+    model.set_many([0, 1, 3])
+    assert changes == [[1], [0, 3]]
+    model.set_many([0, 1])
+    assert changes[-1] == [0, 3] and len(changes) == 2
+
+
+def test_clear_notifies_selected_indices():
+    model, changes = make_model()
+    model.set_many([3, 0])
+    model.clear()
+    assert sorted(changes[-1]) == [0, 3]
+    assert model.selected_items() == []
+
+
+def test_clear_without_selection_is_silent():
+    model, changes = make_model()
+    model.clear()
+    assert changes == []
+
+
+def test_selected_items_follow_grid_order():
+    model, _ = make_model()
+    model.set_many([3, 1])
+    assert model.selected_items() == ["B", "D"]
+
+
+def test_reset_drops_selection_and_keeps_listeners():
+    model, changes = make_model()
+    model.toggle(0)
+    model.reset(["X", "Y"])
+    assert model.selected_items() == []
+    model.toggle(1)
+    assert changes[-1] == [1]
+    assert model.selected_items() == ["Y"]
@@ -0,0 +1,3 @@
+# Codice condiviso dagli esercizi character_vision, word_vision e images_vision.
+# startup viene importato per primo: segna l'inizio del rapporto sui tempi di avvio.
+from vision_engine import startup  # noqa: F401
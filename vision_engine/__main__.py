@@ -0,0 +1,6 @@
+from vision_engine.launcher import main
+
+# Protetto perché i processi avviati con "spawn" (indice delle immagini) reimportano
+# il modulo principale
+if __name__ == "__main__":
+    main()
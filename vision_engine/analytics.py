@@ -0,0 +1,152 @@
+from datetime import datetime
+
+import numpy as np
+
+_GROW = 1024
+
+
+class ProgressAnalytics:
+    # Statistiche sullo storico dei progressi di uno o più esercizi. Le colonne degli
+    # store vengono copiate una volta sola in array NumPy; gli store sono in sola
+    # aggiunta, quindi a ogni update() vengono copiati solo i risultati nuovi. Tutti i
+    # calcoli sono vettoriali e vengono ricalcolati solo se sono arrivati risultati nuovi.
+    # I vecchi risultati importati da progress.json hanno i campi mancanti a NaN (tempo)
+    # o -1 (numero di finali e falsi positivi).
+    COLUMNS = {
+        "timestamp": "M8[m]",
+        "exercise": np.int8,
+        "display_time": np.float32,
+        "n_initial": np.int16,
+        "n_final": np.int16,
+        "hits": np.int16,
+        "false_alarms": np.int16,
+    }
+
+    def __init__(self, stores):
+        # stores: nome dell'esercizio -> ProgressStore
+        self.stores = dict(stores)
+        self.exercises = list(self.stores)
+        self._consumed = dict.fromkeys(self.stores, 0)
+        self._size = 0
+        self._data = {name: np.empty(0, dtype) for name, dtype in self.COLUMNS.items()}
+        self._cache = {}
+
+    def __len__(self):
+        return self._size
+
+    def column(self, name):
+        return self._data[name][:self._size]
+
+    def update(self):
+        for code, (exercise, store) in enumerate(self.stores.items()):
+            start = self._consumed[exercise]
+            total = len(store)
+            if total > start:
+                self._append(code, store.columns(), start, total)
+                self._consumed[exercise] = total
+        return self
+
+    def _append(self, code, records, start, end):
+        count = end - start
+        size = self._size + count
+        if size > len(self._data["timestamp"]):
+            # Capacità raddoppiata: aggiungere risultati costa O(1) ammortizzato
+            capacity = max(size, 2 * len(self._data["timestamp"]), _GROW)
+            for name, values in self._data.items():
+                grown = np.empty(capacity, values.dtype)
+                grown[:self._size] = values[:self._size]
+                self._data[name] = grown
+
+        def column(name):
+            # La slice di array.array è una copia: NumPy non blocca l'array originale
+            values = records.columns[name][start:end]
+            return np.frombuffer(values, dtype=values.typecode) if count else np.empty(0)
+
+        # Le date vengono mostrate (e raggruppate per giorno) nell'ora locale
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+        n_final = column("n_final")
+        fields = {
+            "timestamp": ((column("timestamp") + utc_offset) // 60).astype(np.int64).astype("M8[m]"),
+            "exercise": np.full(count, code),
+            "display_time": column("display_time"),
+            "n_initial": column("n_initial"),
+            "n_final": np.where(n_final > 0, n_final, -1),
+            "hits": column("hits"),
+            "false_alarms": column("false_alarms"),
+        }
+        for name, values in fields.items():
+            self._data[name][self._size:size] = values
+        self._size = size
+        self._cache.clear()
+
+    def _sorted(self, exercise=None):
+        # Indici dei risultati (di un esercizio o di tutti) in ordine cronologico
+        key = ("order", exercise)
+        if key not in self._cache:
+            timestamps = self.column("timestamp")
+            if exercise is None:
+                index = np.arange(self._size)
+            else:
+                index = np.flatnonzero(self.column("exercise") == self.exercises.index(exercise))
+            self._cache[key] = index[np.argsort(timestamps[index], kind="stable")]
+        return self._cache[key]
+
+    def accuracy(self, exercise=None):
+        index = self._sorted(exercise)
+        hits = self.column("hits")[index].astype(np.float64)
+        n_initial = self.column("n_initial")[index]
+        return np.divide(hits, n_initial, out=np.zeros_like(hits), where=n_initial > 0)
+
+    def rolling_accuracy(self, window=10, exercise=None):
+        # Media mobile dell'accuratezza sugli ultimi `window` round
+        accuracy = self.accuracy(exercise)
+        if not len(accuracy):
+            return accuracy
+        cumulative = np.concatenate(([0.0], np.cumsum(accuracy)))
+        ends = np.arange(1, len(accuracy) + 1)
+        starts = np.maximum(ends - window, 0)
+        return (cumulative[ends] - cumulative[starts]) / (ends - starts)
+
+    def accuracy_by(self, column, exercise=None):
+        # Accuratezza media per valore di una colonna (es. "n_initial" o "display_time"):
+        # restituisce (valori, accuratezza media, numero di round)
+        index = self._sorted(exercise)
+        values = self.column(column)[index]
+        keep = ~np.isnan(values) if values.dtype.kind == "f" else values >= 0
+        levels, inverse = np.unique(values[keep], return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(levels))
+        totals = np.bincount(inverse, weights=self.accuracy(exercise)[keep], minlength=len(levels))
+        return levels, totals / np.maximum(counts, 1), counts
+
+    def streaks(self, exercise=None, today=None):
+        # Giorni consecutivi con almeno un round: (serie attuale, serie migliore). La
+        # serie attuale è quella che arriva a oggi o a ieri (ora locale, come i
+        # timestamp della colonna); se l'ultimo round è più vecchio è interrotta
+        days = np.unique(self.column("timestamp")[self._sorted(exercise)].astype("M8[D]"))
+        if not len(days):
+            return 0, 0
+        breaks = np.flatnonzero(np.diff(days) != np.timedelta64(1, "D"))
+        starts = np.concatenate(([0], breaks + 1))
+        ends = np.concatenate((breaks + 1, [len(days)]))
+        lengths = ends - starts
+        today = np.datetime64(today or datetime.now().date(), "D")
+        current = int(lengths[-1]) if today - days[-1] <= np.timedelta64(1, "D") else 0
+        return current, int(lengths.max())
+
+    def summary(self, exercise=None, window=10):
+        # Il giorno fa parte della chiave: la serie attuale cambia a mezzanotte
+        today = datetime.now().date()
+        key = ("summary", exercise, window, today)
+        if key not in self._cache:
+            accuracy = self.accuracy(exercise)
+            current, best = self.streaks(exercise, today)
+            rolling = self.rolling_accuracy(window, exercise)
+            self._cache[key] = {
+                "rounds": int(len(accuracy)),
+                "accuracy": float(accuracy.mean()) if len(accuracy) else 0.0,
+                "recent_accuracy": float(rolling[-1]) if len(rolling) else 0.0,
+                "current_streak": current,
+                "best_streak": best,
+            }
+        return self._cache[key]
+
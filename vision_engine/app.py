@@ -0,0 +1,629 @@
+import os
+import sys
+import time
+import tkinter as tk
+
+from vision_engine import startup
+from vision_engine.database import DEFAULT_USER, DatabaseProgressStore, SessionDatabase
+from vision_engine.display import TkDisplay
+from vision_engine.persistence import ProgressWriter
+from vision_engine.prefetch import Prefetcher
+from vision_engine.progress import ProgressStore
+from vision_engine.records import RoundRecord
+from vision_engine.resources import database_path
+from vision_engine.scheduler import StaircaseScheduler
+from vision_engine.scoring import draw_final, score_round
+from vision_engine.selection import SelectionModel
+from vision_engine.timing import ExposureTimer, ScreenTransition, log_transition
+
+
+class MemoryApp:
+    # Esercizio di memoria visiva: mostra alcuni stimoli per `time` secondi, poi una
+    # griglia in cui gli stessi stimoli sono mescolati a dei distrattori e l'utente
+    # deve selezionare quelli visti. Il tipo di stimolo lo decide il `provider`.
+    def __init__(self, root, provider, on_back=None, user=None, database=None, plan=None):
+        self.root = root
+        self.provider = provider
+        self.on_back = on_back
+        self.user = user or os.environ.get("VISION_USER") or DEFAULT_USER
+        self.database = SessionDatabase(database_path()) if database is None else database
+        self.display = TkDisplay(root)
+        self.root.title(f"{provider.title} - {self.user}")
+
+        self.time_var = tk.DoubleVar()
+        self.num_initial_var = tk.IntVar()
+        self.num_final_var = tk.IntVar()
+
+        self.prefetcher = Prefetcher(root)
+        # I progressi del profilo sono nel database comune; quelli anonimi dei vecchi
+        # file dell'esercizio (progress.bin nella cartella dei dati, progress.json
+        # accanto al programma) vengono importati una volta nel profilo predefinito
+        os.makedirs(provider.data_dir, exist_ok=True)
+        legacy = ProgressStore(os.path.join(provider.data_dir, "progress.bin"),
+                               os.path.join(provider.resource_dir, "progress.json"))
+        self.progress = DatabaseProgressStore(self.database, self.user, provider.name, legacy)
+        # Il lavoro di riscaldamento (dizionario, librerie, storico) parte dopo il primo
+        # frame, per non contendere la CPU alla costruzione della schermata iniziale
+        startup.after_first_frame(root, self.warm_up)
+        self.writer = ProgressWriter(self.progress, root, on_error=self.on_save_error)
+        self.analytics = None
+        self.scheduler = None
+        self.adaptive = False
+
+        self.selection = SelectionModel()
+        self.selection.subscribe(self.on_selection_changed)
+
+        # Ricevono uno ScreenTransition a ogni cambio di schermata
+        self.transition_listeners = []
+        if os.environ.get("VISION_TIMING_LOG"):
+            self.subscribe_transitions(log_transition)
+        self.exposure = None
+
+        # Con un piano di sessione (plans.py) i round non vengono estratti al momento ma
+        # letti dal piano, nell'ordine, riprendendo dopo l'ultimo round salvato. Il piano
+        # può essere un SessionPlan già aperto o il percorso del file
+        self.owns_plan = isinstance(plan, str)
+        if self.owns_plan:
+            from vision_engine.plans import SessionPlan
+
+            plan = SessionPlan(plan)
+        if plan is not None and plan.exercise != provider.name:
+            raise ValueError(f"Il piano {plan.path} è per l'esercizio {plan.exercise}, non per {provider.name}")
+        self.plan = plan
+        self.plan_index = None
+        self.plan_round = None
+        self.positions = None
+
+        self.screens = {}
+        self.current_screen = None
+        self.setup_initial_screen()
+        self.configure_job = None
+        self.configure_binding = root.bind("<Configure>", self.on_configure, add="+")
+
+    def warm_up(self):
+        self.prefetcher.submit(self.provider.warm_up)
+        self.prefetcher.submit(len, self.progress)
+
+    def font(self, size):
+        return (self.provider.font_family, size)
+
+    def subscribe_transitions(self, listener):
+        self.transition_listeners.append(listener)
+
+    def show_screen(self, name, timer_jitter=None):
+        # Le schermate vengono costruite una volta sola e poi solo mostrate o nascoste.
+        # update_idletasks disegna subito la schermata: l'istante restituito è quello
+        # del primo frame, da cui si misurano i tempi di esposizione e di risposta
+        requested_at = time.perf_counter()
+        for screen_name, frame in self.screens.items():
+            if screen_name != name:
+                frame.pack_forget()
+        self.screens[name].pack(fill="both", expand=True)
+        self.current_screen = name
+        self.root.update_idletasks()
+        shown_at = time.perf_counter()
+        if self.transition_listeners:
+            transition = ScreenTransition(name, shown_at - requested_at, timer_jitter)
+            for listener in self.transition_listeners:
+                listener(transition)
+        return shown_at
+
+    def setup_initial_screen(self):
+        font_style = ("Arial", 16)
+        noun = self.provider.noun
+        frame = tk.Frame(self.root)
+
+        tk.Label(frame, text="Tempo in secondi:", font=font_style).pack(pady=10)
+        tk.Entry(frame, textvariable=self.time_var, font=font_style).pack(pady=10)
+
+        tk.Label(frame, text=f"Numero di {noun} iniziali:", font=font_style).pack(pady=10)
+        tk.Entry(frame, textvariable=self.num_initial_var, font=font_style).pack(pady=10)
+
+        tk.Label(frame, text=f"Numero di {noun} finali:", font=font_style).pack(pady=10)
+        tk.Entry(frame, textvariable=self.num_final_var, font=font_style).pack(pady=10)
+
+        self.error_label = tk.Label(frame, text="", fg="red", font=font_style)
+        self.error_label.pack(pady=10)
+
+        tk.Button(frame, text="Inizia", command=self.start_test, font=font_style).pack(pady=10)
+        tk.Button(frame, text="Sessione adattiva", command=self.start_adaptive, font=font_style).pack(pady=10)
+        tk.Button(frame, text="Progress", command=self.show_progress, font=font_style).pack(pady=10)
+        if self.on_back is not None:
+            tk.Button(frame, text="Esercizi", command=self.back, font=font_style).pack(pady=10)
+
+        self.screens["setup"] = frame
+        self.show_screen("setup")
+
+    def build_initial_screen(self):
+        frame = tk.Frame(self.root)
+        self.canvas_size = (self.display.width, self.display.height)
+        self.initial_canvas = tk.Canvas(frame, width=self.canvas_size[0], height=self.canvas_size[1])
+        self.initial_canvas.pack()
+        self.stimulus_pool = []
+        self.screens["initial"] = frame
+
+    def apply_scale(self):
+        # Dimensioni degli stimoli secondo la risoluzione e i DPI del monitor su cui si
+        # trova la finestra, ricalcolate a ogni round e quando la finestra si sposta:
+        # il provider sceglie font e livello delle miniature, qui si adatta il canvas
+        self.provider.set_scale(self.display.scale)
+        if "initial" in self.screens:
+            size = (self.display.width, self.display.height)
+            if size != self.canvas_size:
+                self.canvas_size = size
+                self.initial_canvas.configure(width=size[0], height=size[1])
+
+    def on_configure(self, event):
+        # Spostamenti e ridimensionamenti arrivano a raffica: si ricalcola una volta sola,
+        # e mai mentre un round è in corso
+        if event.widget is not self.root:
+            return
+        if self.configure_job is not None:
+            self.root.after_cancel(self.configure_job)
+        self.configure_job = self.root.after(200, self.on_configure_done)
+
+    def on_configure_done(self):
+        self.configure_job = None
+        if self.current_screen in ("setup", "results"):
+            self.apply_scale()
+
+    def build_final_screen(self):
+        frame = tk.Frame(self.root)
+        self.canvas = tk.Canvas(frame)
+        self.scrollbar = tk.Scrollbar(frame, orient="vertical", command=self.canvas.yview)
+        self.scrollable_frame = tk.Frame(self.canvas)
+
+        self.scrollable_frame.bind(
+            "<Configure>",
+            lambda e: self.canvas.configure(
+                scrollregion=self.canvas.bbox("all")
+            )
+        )
+
+        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+
+        # Il pulsante va impacchettato per primo perché resti visibile sotto la griglia
+        tk.Button(frame, text="Invia", command=self.check_results, font=self.font(16)).pack(side="bottom", pady=20)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.button_pool = []
+        # Con un layout ad atlante la griglia è un'unica immagine sul canvas e non servono pulsanti
+        self.atlas_grid = None
+        layout = self.provider.grid_layout()
+        if layout is not None:
+            from vision_engine.atlas import AtlasGrid
+
+            self.atlas_grid = AtlasGrid(self.canvas, layout, self.toggle_slot)
+        self.screens["final"] = frame
+
+        # Tastiera: il tasto di uno stimolo lo seleziona, Backspace azzera la selezione
+        # e Invio conferma (nella sessione adattiva, sui risultati, avvia il round successivo)
+        self.root.bind("<Key>", self.on_key, add="+")
+
+    def build_results_screen(self):
+        frame = tk.Frame(self.root)
+        self.result_labels = [tk.Label(frame, font=self.font(16)) for _ in range(3)]
+        for label in self.result_labels:
+            label.pack(pady=10)
+        self.save_error_label = tk.Label(frame, text="", fg="red", font=self.font(16))
+        self.save_error_label.pack(pady=10)
+        # Nella sessione adattiva si passa direttamente al round successivo
+        self.next_round_button = tk.Button(frame, text="Prossimo round", command=self.start_adaptive, font=self.font(16))
+        self.restart_button = tk.Button(frame, text="Ricomincia", command=self.stop_adaptive, font=self.font(16))
+        self.restart_button.pack(pady=10)
+        tk.Button(frame, text="Progress", command=self.show_progress, font=self.font(16)).pack(pady=10)
+        if self.on_back is not None:
+            tk.Button(frame, text="Esercizi", command=self.back, font=self.font(16)).pack(pady=10)
+        self.screens["results"] = frame
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        if self.exposure is not None:
+            self.exposure.cancel()
+        if self.plan is not None and self.owns_plan:
+            self.plan.close()
+        self.plan = None
+        self.writer.close()
+        self.prefetcher.shutdown()
+
+    def back(self):
+        self.close()
+        self.root.unbind("<Key>")
+        self.root.unbind("<Configure>", self.configure_binding)
+        if self.configure_job is not None:
+            self.root.after_cancel(self.configure_job)
+        for frame in self.screens.values():
+            frame.destroy()
+        self.screens = {}
+        self.on_back()
+
+    def get_scheduler(self):
+        if self.scheduler is None:
+            # Ogni profilo ha la sua scala di difficoltà
+            path = os.path.join(self.provider.data_dir, f"scheduler-{self.database.user_id(self.user)}.json")
+            self.scheduler = StaircaseScheduler(path, self.provider.max_items()).load(self.progress)
+        return self.scheduler
+
+    def start_adaptive(self):
+        # Tempo e numero di stimoli vengono proposti dallo scheduler invece che dal modulo
+        self.adaptive = True
+        scheduler = self.get_scheduler()
+        # Quanti stimoli entrano nello schermo, misurato su stimoli veri: per le parole
+        # dipende dalla loro lunghezza
+        sample = self.provider.draw_initial(min(scheduler.n_initial, self.provider.max_items()))
+        capacity = self.provider.placer(self.display, sample).capacity
+        display_time, num_initial, num_final = scheduler.propose(capacity)
+        self.time_var.set(display_time)
+        self.num_initial_var.set(num_initial)
+        self.num_final_var.set(num_final)
+        if not self.start_test():
+            self.stop_adaptive()
+
+    def stop_adaptive(self):
+        self.adaptive = False
+        self.show_screen("setup")
+
+    def next_plan_round(self):
+        # Si riprende dal round dopo l'ultimo giocato di questo piano; i round estratti
+        # al momento o di altri piani in mezzo non contano
+        if self.plan_index is None:
+            self.plan_index = 0
+            columns = self.progress.columns().columns
+            plan_ids, plan_rounds = columns["plan_id"], columns["plan_round"]
+            for index in range(len(plan_ids) - 1, -1, -1):
+                if plan_ids[index] == self.plan.plan_id and plan_rounds[index] >= 0:
+                    self.plan_index = plan_rounds[index] + 1
+                    break
+        return self.plan[self.plan_index % len(self.plan)]
+
+    def start_test(self):
+        started_at = time.perf_counter()
+        self.plan_round = None
+        if self.plan is not None:
+            # Il piano decide anche quanti stimoli mostrare
+            self.plan_round = self.next_plan_round()
+            self.num_initial_var.set(self.plan.num_initial)
+            self.num_final_var.set(self.plan.num_final)
+        try:
+            self.time = float(self.time_var.get())
+            self.num_initial = self.num_initial_var.get()
+            self.num_final = self.num_final_var.get()
+        except tk.TclError:
+            self.error_label.config(text="Inserisci solo numeri.")
+            return False
+
+        if not self.validate_inputs():
+            return False
+
+        self.apply_scale()
+        if self.plan_round is not None:
+            self.items_initial = self.plan_round.items_initial
+        else:
+            self.items_initial = self.provider.draw_initial(self.num_initial)
+        self.placer = self.provider.placer(self.display, self.items_initial)
+        if self.num_initial > self.placer.capacity:
+            self.error_label.config(
+                text=f"Lo schermo può contenere al massimo {self.placer.capacity} {self.provider.noun} iniziali.")
+            return False
+        self.positions = None
+        if self.plan_round is not None:
+            self.positions = self.plan.positions_for(self.plan_round, self.display, self.placer)
+            self.plan_index += 1
+
+        self.error_label.config(text="")
+        shown_at = self.display_initial()
+        # Il tempo di esposizione parte dal primo frame con gli stimoli: il tempo speso
+        # a piazzarli e decodificarli non viene tolto all'utente, ma è misurato a parte
+        self.render_latency = shown_at - started_at
+
+        # Distrattori e risorse della griglia finale vengono preparati in background
+        # mentre l'utente memorizza e mostrati quando è trascorso il tempo
+        self.final_future = self.prefetcher.submit(self.prepare_final)
+        self.exposure = ExposureTimer(self.root, self.time, self.end_exposure)
+        self.exposure.start(shown_at)
+        return True
+
+    def validate_inputs(self):
+        noun = self.provider.noun
+        max_items = self.provider.max_items()
+        if self.time <= 0:
+            self.error_label.config(text="Il tempo deve essere un numero positivo.")
+            return False
+        if not (1 <= self.num_initial <= max_items):
+            self.error_label.config(text=f"Il numero di {noun} iniziali deve essere compreso tra 1 e {max_items}.")
+            return False
+        if not (self.num_initial <= self.num_final <= max_items):
+            self.error_label.config(
+                text=f"Il numero di {noun} finali deve essere un numero positivo e compreso tra il numero di {noun} iniziali e {max_items}.")
+            return False
+        return True
+
+    def display_initial(self):
+        if "initial" not in self.screens:
+            self.build_initial_screen()
+        canvas = self.initial_canvas
+
+        # Gli elementi del canvas vengono riusati tra un round e l'altro: se ne creano
+        # di nuovi solo quando un round ha più stimoli di tutti i precedenti
+        while len(self.stimulus_pool) < len(self.items_initial):
+            self.stimulus_pool.append(self.provider.create_stimulus(canvas))
+
+        assets = self.provider.load_assets(self.items_initial)
+        positions = self.positions or self.placer.place(len(self.items_initial))
+        for canvas_item, item, asset, (x, y) in zip(self.stimulus_pool, self.items_initial, assets, positions):
+            self.provider.update_stimulus(canvas, canvas_item, x, y, item, asset)
+            canvas.itemconfigure(canvas_item, state="normal")
+        for canvas_item in self.stimulus_pool[len(self.items_initial):]:
+            canvas.itemconfigure(canvas_item, state="hidden")
+
+        return self.show_screen("initial")
+
+    def end_exposure(self, timer):
+        # Allo scadere del tempo gli stimoli spariscono subito, anche se la griglia
+        # finale non è ancora pronta: l'esposizione non si allunga mai
+        for canvas_item in self.stimulus_pool:
+            self.initial_canvas.itemconfigure(canvas_item, state="hidden")
+        self.root.update_idletasks()
+        self.exposure_time = time.perf_counter() - timer.started_at
+        self.exposure = None
+        self.prefetcher.when_ready(self.final_future,
+                                   lambda prepared: self.display_final(prepared, timer.jitter),
+                                   self.final_failed)
+
+    def final_failed(self, error):
+        # La griglia finale non si può preparare (es. un'immagine cancellata o rovinata
+        # dopo la lettura della cartella, troppo pochi distrattori): si torna al modulo
+        # con il messaggio invece di lasciare il canvas vuoto
+        self.stop_adaptive()
+        self.error_label.config(text=f"Impossibile preparare la griglia finale: {error}")
+
+    def prepare_final(self):
+        if self.plan_round is not None:
+            items_final = self.plan_round.items_final
+        else:
+            items_final = draw_final(self.provider, self.items_initial, self.num_final)
+        assets = self.provider.load_assets(items_final)
+        # Anche l'atlante viene composto qui, fuori dal thread di Tk
+        layout = self.provider.grid_layout()
+        atlas = None
+        if layout is not None:
+            from vision_engine.atlas import compose_atlas
+
+            atlas = compose_atlas(assets, layout)
+        return items_final, assets, atlas, layout
+
+    def display_final(self, prepared, timer_jitter=None):
+        self.items_final, assets, atlas, layout = prepared
+        if "final" not in self.screens:
+            self.build_final_screen()
+
+        self.selection.reset(self.items_final)
+        self.keys = {}
+        for slot, item in enumerate(self.items_final):
+            key = self.provider.key_for(item)
+            if key is not None:
+                self.keys[key] = slot
+        if self.atlas_grid is not None:
+            self.atlas_grid.show(atlas, len(self.items_final), layout)
+        else:
+            self.display_buttons(assets)
+
+        self.canvas.yview_moveto(0)
+        self.final_shown_at = self.show_screen("final", timer_jitter)
+        self.click_times = []
+
+    def display_buttons(self, assets):
+        while len(self.button_pool) < len(self.items_final):
+            slot = len(self.button_pool)
+            button = self.provider.create_button(self.scrollable_frame)
+            button.configure(command=lambda slot=slot: self.toggle_slot(slot))
+            button.default_bg = button.cget("bg")
+            self.button_pool.append(button)
+
+        for slot, (item, asset) in enumerate(zip(self.items_final, assets)):
+            button = self.button_pool[slot]
+            self.provider.update_button(button, item, asset)
+            button.configure(bg=button.default_bg)
+            row, column = divmod(slot, 5)  # 5 colonne per riga
+            button.grid(row=row, column=column, padx=10, pady=10)
+        for button in self.button_pool[len(self.items_final):]:
+            button.grid_remove()
+
+    def toggle_slot(self, slot):
+        self.click_times.append(time.perf_counter() - self.final_shown_at)
+        self.selection.toggle(slot)
+
+    def on_selection_changed(self, slots):
+        # Aggiorna solo i pulsanti cambiati; il colore non viene mai riletto
+        if self.atlas_grid is not None:
+            for slot in slots:
+                self.atlas_grid.set_selected(slot, self.selection.is_selected(slot))
+            return
+        for slot in slots:
+            button = self.button_pool[slot]
+            button.configure(bg="blue" if self.selection.is_selected(slot) else button.default_bg)
+
+    def on_key(self, event):
+        if self.current_screen == "results" and self.adaptive and event.keysym == "Return":
+            self.start_adaptive()
+            return
+        if self.current_screen != "final":
+            return
+        if event.keysym == "Return":
+            self.check_results()
+        elif event.keysym == "BackSpace":
+            self.selection.clear()
+        elif event.char.lower() in self.keys:
+            self.toggle_slot(self.keys[event.char.lower()])
+
+    def check_results(self):
+        self.submit_time = time.perf_counter() - self.final_shown_at
+        selected_items = self.selection.selected_items()
+        correct_items = score_round(self.items_initial, selected_items)
+        score = len(correct_items)
+
+        self.save_progress(selected_items, correct_items)
+
+        noun = self.provider.noun.capitalize()
+        result_message = f"{noun} selezionate: {', '.join(selected_items)}\n" \
+                         f"{noun} corrette: {', '.join(correct_items)}"
+        initial_message = f"{noun} iniziali: {', '.join(self.items_initial)}"
+        score_message = f"Score: {score}/{self.num_initial}"
+
+        if "results" not in self.screens:
+            self.build_results_screen()
+        for label, text in zip(self.result_labels, (result_message, initial_message, score_message)):
+            label.config(text=text)
+        self.save_error_label.config(text="")
+        if self.adaptive:
+            self.next_round_button.pack(before=self.restart_button, pady=10)
+        else:
+            self.next_round_button.pack_forget()
+        self.show_screen("results")
+
+    def save_progress(self, selected_items, correct_items):
+        # Il salvataggio avviene in background: la schermata dei risultati non aspetta il disco
+        record = RoundRecord.now(
+            display_time=self.time,
+            n_initial=self.num_initial,
+            n_final=self.num_final,
+            hits=len(correct_items),
+            false_alarms=len(selected_items) - len(correct_items),
+            submit_time=self.submit_time,
+            click_times=self.click_times,
+            exposure_time=self.exposure_time,
+            render_latency=self.render_latency,
+            plan_round=-1 if self.plan_round is None else self.plan_round.index,
+            plan_id=0 if self.plan_round is None else self.plan.plan_id,
+        )
+        self.writer.submit(record)
+
+        # Lo scheduler impara solo dai round che ha proposto lui: un round impostato a
+        # mano o preso da un piano ha una difficoltà qualsiasi e sposterebbe la scala
+        if self.adaptive and self.plan_round is None:
+            scheduler = self.get_scheduler()
+            scheduler.update(record)
+            self.prefetcher.submit(scheduler.save, scheduler.state())
+
+    def on_save_error(self, exc):
+        message = f"Impossibile salvare i progressi: {exc}"
+        if "results" in self.screens:
+            self.save_error_label.config(text=message)
+        self.error_label.config(text=message)
+
+    def show_progress(self):
+        # La vista dei progressi (e NumPy per le statistiche) si carica alla prima apertura
+        from vision_engine.progress_view import ProgressView
+
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Progressi")
+        self.show_statistics(progress_window)
+        ProgressView(progress_window, self.progress)
+
+    def show_statistics(self, parent, width=400, height=120):
+        try:
+            from vision_engine.analytics import ProgressAnalytics
+            from vision_engine.progress_view import draw_line_chart
+        except ImportError:
+            # Senza NumPy la finestra mostra solo l'elenco dei progressi
+            return
+        if self.analytics is None:
+            self.analytics = ProgressAnalytics({self.provider.name: self.progress})
+        summary = self.analytics.update().summary()
+        if not summary["rounds"]:
+            return
+
+        frame = tk.Frame(parent)
+        frame.pack(side="top", fill="x")
+        tk.Label(frame, font=("Helvetica", 14), text=(
+            f"Round: {summary['rounds']}, accuratezza media: {summary['accuracy']:.0%}, "
+            f"ultimi 10: {summary['recent_accuracy']:.0%}\n"
+            f"Giorni consecutivi: {summary['current_streak']} (record: {summary['best_streak']})"
+        )).pack(pady=5)
+        chart = tk.Canvas(frame, width=width, height=height, bg="white")
+        chart.pack(pady=5)
+        draw_line_chart(chart, self.analytics.rolling_accuracy(10), width, height)
+
+        # Accuratezza per livello di difficoltà, dal livello più facile al più difficile
+        for column, title, unit in (("n_initial", "stimoli da ricordare", ""),
+                                    ("display_time", "tempo di memorizzazione", " s")):
+            levels, accuracy, _ = self.analytics.accuracy_by(column)
+            if len(levels) < 2:
+                continue
+            if column == "display_time":
+                levels, accuracy = levels[::-1], accuracy[::-1]
+            tk.Label(frame, font=("Helvetica", 12), text=(
+                f"Accuratezza per {title}: da {levels[0]:g}{unit} ({accuracy[0]:.0%}) "
+                f"a {levels[-1]:g}{unit} ({accuracy[-1]:.0%})"
+            )).pack()
+            chart = tk.Canvas(frame, width=width, height=height // 2, bg="white")
+            chart.pack(pady=5)
+            draw_line_chart(chart, accuracy, width, height // 2, fill="green")
+
+
+def run(app_factory, startup_report=None, startup_check=False, profile=None):
+    # startup_report: stampa i tempi di avvio su stderr (di default se è impostata
+    # VISION_STARTUP_REPORT); startup_check: chiude la finestra appena disegnata ed esce
+    # con 1 se il primo frame ha superato startup.COLD_START_BUDGET_MS; profile: misura
+    # le callback di Tk (watchdog.py) e all'uscita ne stampa il riepilogo, e se è il
+    # nome di un file ci salva la traccia (di default da VISION_PROFILE)
+    if startup_report is None:
+        startup_report = startup.report_requested()
+    startup.mark("import")
+    profiler = None
+    if profile is None:
+        from vision_engine.watchdog import profile_requested
+
+        profile = profile_requested()
+    if profile:
+        from vision_engine.watchdog import TkProfiler
+
+        # Prima di creare i widget, perché Tk registri le callback già misurate
+        profiler = TkProfiler().install()
+    root = tk.Tk()
+    # La finestra resta nascosta finché la schermata iniziale non è pronta, così non
+    # si vede una finestra vuota che poi si ridimensiona
+    root.withdraw()
+    startup.mark("finestra tk")
+    # Imposta la finestra a schermo intero, ma ridimensionabile
+    root.geometry("1080x720")
+    root.resizable(True, True)
+    app = app_factory(root)
+    startup.mark("schermata iniziale")
+
+    def on_escape(event):
+        root.attributes('-fullscreen', False)
+        app.flush()
+
+    def on_close():
+        app.close()
+        root.destroy()
+
+    root.attributes('-fullscreen', True)
+    root.bind('<Escape>', on_escape)
+    root.protocol("WM_DELETE_WINDOW", on_close)
+    root.deiconify()
+
+    def on_first_frame():
+        if startup_report or startup_check:
+            startup.report()
+        if startup_check:
+            on_close()
+
+    startup.after_first_frame(root, on_first_frame)
+    root.mainloop()
+    # I risultati ancora in coda vengono scritti prima di uscire
+    app.close()
+    if profiler is not None:
+        profiler.uninstall()
+        print(profiler.format_summary(), file=sys.stderr)
+        if isinstance(profile, str) and profile not in ("1", "true"):
+            profiler.export_trace(profile)
+            print(f"Traccia delle callback salvata in {profile}", file=sys.stderr)
+    if startup_check and not startup.within_budget():
+        sys.exit(1)
+    return app
@@ -0,0 +1,110 @@
+class GridLayout:
+    # Griglia a colonne fisse di celle uguali: dove sta lo stimolo numero `slot` e, al
+    # contrario, quale stimolo c'è in un punto (x, y). Entrambe le operazioni sono
+    # aritmetica, senza cercare tra gli elementi del canvas.
+    def __init__(self, cell_width, cell_height, columns=5, gap=20):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.columns = columns
+        self.gap = gap
+
+    def __eq__(self, other):
+        return isinstance(other, GridLayout) and (
+            (self.cell_width, self.cell_height, self.columns, self.gap)
+            == (other.cell_width, other.cell_height, other.columns, other.gap))
+
+    def __hash__(self):
+        return hash((self.cell_width, self.cell_height, self.columns, self.gap))
+
+    def origin(self, slot):
+        # Angolo in alto a sinistra della cella `slot`
+        row, column = divmod(slot, self.columns)
+        return (self.gap // 2 + column * (self.cell_width + self.gap),
+                self.gap // 2 + row * (self.cell_height + self.gap))
+
+    def size(self, count):
+        rows = -(-count // self.columns)
+        columns = min(count, self.columns)
+        return columns * (self.cell_width + self.gap), rows * (self.cell_height + self.gap)
+
+    def slot_at(self, x, y, count):
+        # None se il punto è nello spazio tra le celle o fuori dalla griglia
+        step_x = self.cell_width + self.gap
+        step_y = self.cell_height + self.gap
+        x -= self.gap // 2
+        y -= self.gap // 2
+        if x < 0 or y < 0:
+            return None
+        column, offset_x = divmod(int(x), step_x)
+        row, offset_y = divmod(int(y), step_y)
+        if column >= self.columns or offset_x >= self.cell_width or offset_y >= self.cell_height:
+            return None
+        slot = row * self.columns + column
+        return slot if slot < count else None
+
+
+def compose_atlas(assets, layout):
+    # Incolla le miniature (immagini PIL) in un'unica immagine trasparente. Non tocca
+    # Tk, quindi può girare nel thread di prefetch: al thread di Tk resta un solo
+    # trasferimento dell'immagine intera invece di uno per stimolo.
+    from PIL import Image
+
+    atlas = Image.new("RGBA", layout.size(len(assets)), (0, 0, 0, 0))
+    for slot, asset in enumerate(assets):
+        x, y = layout.origin(slot)
+        # Le miniature più piccole della cella vengono centrate
+        atlas.paste(asset, (x + (layout.cell_width - asset.width) // 2,
+                            y + (layout.cell_height - asset.height) // 2))
+    return atlas
+
+
+class AtlasGrid:
+    # La griglia finale disegnata su un canvas come un'unica immagine più un rettangolo
+    # di selezione per stimolo. Un clic viene tradotto nel numero dello stimolo con
+    # GridLayout.slot_at e passato a `on_click`.
+    def __init__(self, canvas, layout, on_click, outline="blue", width=4):
+        self.canvas = canvas
+        self.layout = layout
+        self.on_click = on_click
+        self.outline = outline
+        self.width = width
+        self.count = 0
+        self.photo = None
+        self.tag = f"atlas{id(self)}"
+        self.image_item = canvas.create_image(0, 0, anchor="nw", state="hidden", tags=self.tag)
+        self.highlights = []
+        canvas.tag_bind(self.tag, "<Button-1>", self.click)
+
+    def show(self, atlas, count, layout=None):
+        # Crea la PhotoImage dall'atlante già composto: una sola copia dei pixel verso Tk.
+        # `layout` è quello con cui l'atlante è stato composto, se è cambiato (la
+        # finestra è passata su un monitor con un'altra scala) i rettangoli si rifanno
+        from PIL import ImageTk
+
+        if layout is not None and layout != self.layout:
+            self.layout = layout
+            for item in self.highlights:
+                self.canvas.delete(item)
+            self.highlights = []
+
+        self.photo = ImageTk.PhotoImage(atlas)
+        self.count = count
+        self.canvas.itemconfigure(self.image_item, image=self.photo, state="normal")
+        self.canvas.configure(scrollregion=(0, 0, atlas.width, atlas.height))
+        # I rettangoli sono riusati tra un round e l'altro e partono tutti nascosti
+        while len(self.highlights) < count:
+            x, y = self.layout.origin(len(self.highlights))
+            self.highlights.append(self.canvas.create_rectangle(
+                x - self.width, y - self.width,
+                x + self.layout.cell_width + self.width, y + self.layout.cell_height + self.width,
+                outline=self.outline, width=self.width, state="hidden", tags=self.tag))
+        for item in self.highlights:
+            self.canvas.itemconfigure(item, state="hidden")
+
+    def set_selected(self, slot, selected):
+        self.canvas.itemconfigure(self.highlights[slot], state="normal" if selected else "hidden")
+
+    def click(self, event):
+        slot = self.layout.slot_at(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y), self.count)
+        if slot is not None:
+            self.on_click(slot)
@@ -0,0 +1,231 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from vision_engine.display import VirtualDisplay
+from vision_engine.placement import GridPlacer
+from vision_engine.progress import ProgressStore
+from vision_engine.records import RoundRecord
+from vision_engine.scoring import score_round
+from vision_engine.simulation import simulate
+
+
+def timed(function, repeat):
+    # Mediana in secondi di `repeat` chiamate
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def bench_placement(results, quick):
+    rng = random.Random(0)
+    placer = GridPlacer(1920, 1080, item_width=100, item_height=100, gap=20, margin=50)
+    for count in (10, 25, 50, 100):
+        results[f"placement n={count}"] = timed(lambda: placer.place(count, rng=rng), 50 if quick else 500)
+
+
+def bench_rounds(results, quick):
+    from vision_engine.launcher import load_provider
+
+    rounds = 200 if quick else 2000
+    for exercise, num_initial, num_final in (("lettere", 10, 20), ("parole", 50, 100)):
+        provider = load_provider(exercise)
+        provider.warm_up()
+        rng = random.Random(0)
+        elapsed = timed(lambda: simulate(provider, rounds, num_initial, num_final,
+                                         display=VirtualDisplay(), rng=rng), 3)
+        results[f"round {exercise} {num_initial}/{num_final}"] = elapsed / rounds
+
+
+def bench_scoring(results, quick):
+    items = [f"item{i}" for i in range(100)]
+    initial, selected = items[:50], items[25:75]
+    results["scoring n=100"] = timed(lambda: score_round(initial, selected), 200 if quick else 2000)
+
+
+def bench_thumbnails(results, quick, workdir):
+    try:
+        from PIL import Image
+    except ImportError:
+        print("PIL non installato: benchmark delle miniature saltato", file=sys.stderr)
+        return
+    from vision_engine.atlas import GridLayout, compose_atlas
+    from vision_engine.thumbnails import ThumbnailCache
+
+    for count in ((10, 50) if quick else (10, 50, 100)):
+        images_dir = os.path.join(workdir, f"images-{count}")
+        cache_dir = os.path.join(workdir, f"thumbs-{count}")
+        os.makedirs(images_dir)
+        paths = []
+        for i in range(count):
+            path = os.path.join(images_dir, f"{i}.png")
+            Image.effect_noise((512, 512), 64).convert("RGB").save(path)
+            paths.append(path)
+
+        cache = ThumbnailCache(cache_dir)
+        start = time.perf_counter()
+        for path in paths:
+            cache.get(path)
+        results[f"thumbnails cold n={count}"] = time.perf_counter() - start
+        cache.flush()
+
+        disk_cache = ThumbnailCache(cache_dir)
+        start = time.perf_counter()
+        for path in paths:
+            disk_cache.get(path)
+        results[f"thumbnails disk n={count}"] = time.perf_counter() - start
+
+        results[f"thumbnails memory n={count}"] = timed(lambda: [disk_cache.get(path) for path in paths], 5)
+
+        # Cambio di monitor: un altro livello della piramide, già su disco
+        start = time.perf_counter()
+        for path in paths:
+            disk_cache.get(path, 200)
+        results[f"thumbnails level switch n={count}"] = time.perf_counter() - start
+
+        thumbnails = [disk_cache.get(path) for path in paths]
+        layout = GridLayout(100, 100)
+        results[f"atlas compose n={count}"] = timed(lambda: compose_atlas(thumbnails, layout), 5)
+
+
+def bench_manifest(results, quick, workdir):
+    from vision_engine.resources import IMAGE_EXTENSIONS, AssetManifest
+
+    for count in ((1000,) if quick else (1000, 10000, 50000)):
+        images_dir = os.path.join(workdir, f"manifest-{count}")
+        os.makedirs(images_dir)
+        for i in range(count):
+            open(os.path.join(images_dir, f"{i}.png"), "wb").close()
+        results[f"manifest scan n={count}"] = timed(
+            lambda: AssetManifest(images_dir, IMAGE_EXTENSIONS).files, 3)
+        manifest = AssetManifest(images_dir, IMAGE_EXTENSIONS, check_interval=0)
+        manifest.refresh()
+        rng = random.Random(0)
+        results[f"manifest distractors n={count}"] = timed(
+            lambda: manifest.sample(50, exclude=manifest.files[:50], rng=rng), 50 if quick else 500)
+
+
+def bench_image_index(results, quick, workdir):
+    # Hash casuali al posto di immagini vere: si misurano deduplicazione e scelta dei
+    # distrattori, non la decodifica (che è quella delle miniature)
+    from vision_engine.image_index import ImageIndex, _IndexState
+    from vision_engine.resources import AssetManifest
+
+    rng = random.Random(0)
+    for count in ((1000,) if quick else (1000, 10000, 50000)):
+        entries = {f"{i}.png": (0, 0, rng.getrandbits(64)) for i in range(count)}
+        results[f"image index dedupe n={count}"] = timed(lambda: _IndexState(entries), 3)
+        index = ImageIndex(AssetManifest(workdir), os.path.join(workdir, "index.bin"))
+        index._state = _IndexState(entries)
+        targets = index.names()[:25]
+        results[f"image index similar distractors n={count}"] = timed(
+            lambda: index.sample_similar(25, targets, similarity=0.8, rng=rng), 20 if quick else 200)
+
+
+def make_history(path, size):
+    store = ProgressStore(path, legacy_path=path + ".missing")
+    record = RoundRecord(1735725600.0, 2.0, 10, 20, 5, 1, 4.5, (0.8, 1.5, 2.2, 3.0, 3.9, 4.1))
+    store.write([record] * size)
+    return store, record
+
+
+def bench_progress(results, quick, workdir):
+    for size in ((100, 1000) if quick else (100, 1000, 10000, 100000)):
+        path = os.path.join(workdir, f"progress-{size}.bin")
+        store, record = make_history(path, size)
+        results[f"progress save history={size}"] = timed(lambda: store.append(record), 20)
+        results[f"progress load history={size}"] = timed(
+            lambda: len(ProgressStore(path, legacy_path=store.legacy_path)), 5)
+
+
+def bench_database(results, quick, workdir):
+    # Dieci profili con lo stesso numero di round: leggere lo storico di uno dipende
+    # dai suoi round, non da quelli di tutto il database
+    from vision_engine.database import SessionDatabase
+
+    record = RoundRecord(1735725600.0, 2.0, 10, 20, 5, 1, 4.5, (0.8, 1.5, 2.2, 3.0, 3.9, 4.1))
+    for size in ((1000,) if quick else (1000, 10000)):
+        database = SessionDatabase(os.path.join(workdir, f"sessions-{size}.db"))
+        for user in range(10):
+            database.add_rounds(f"utente{user}", "lettere", [record] * size)
+        results[f"database save history={size * 10}"] = timed(
+            lambda: database.add_rounds("utente0", "parole", [record]), 20)
+        results[f"database load user history={size}"] = timed(lambda: database.history("utente5", "lettere"), 5)
+        database.close()
+
+
+def bench_analytics(results, quick, workdir):
+    try:
+        from vision_engine.analytics import ProgressAnalytics
+    except ImportError:
+        print("NumPy non installato: benchmark delle statistiche saltato", file=sys.stderr)
+        return
+
+    for size in ((1000,) if quick else (1000, 10000)):
+        store, _ = make_history(os.path.join(workdir, f"analytics-{size}.bin"), size)
+        len(store)
+        results[f"analytics summary history={size}"] = timed(
+            lambda: ProgressAnalytics({"lettere": store}).update().summary(), 5)
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for stage, seconds in results.items():
+        reference = baseline.get(stage)
+        if reference and seconds > reference * (1 + tolerance):
+            regressions.append(f"{stage}: {seconds * 1000:.3f} ms (baseline {reference * 1000:.3f} ms)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Misura la latenza delle fasi di un round senza interfaccia grafica.")
+    parser.add_argument("--quick", action="store_true", help="meno ripetizioni e dimensioni più piccole")
+    parser.add_argument("--json", help="salva i risultati in questo file")
+    parser.add_argument("--compare", help="confronta con i risultati salvati in questo file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="rallentamento massimo rispetto al confronto prima di segnalare una regressione")
+    args = parser.parse_args(argv)
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="vision-bench-")
+    try:
+        bench_placement(results, args.quick)
+        bench_rounds(results, args.quick)
+        bench_scoring(results, args.quick)
+        bench_thumbnails(results, args.quick, workdir)
+        bench_manifest(results, args.quick, workdir)
+        bench_image_index(results, args.quick, workdir)
+        bench_progress(results, args.quick, workdir)
+        bench_database(results, args.quick, workdir)
+        bench_analytics(results, args.quick, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    width = max(len(stage) for stage in results)
+    for stage, seconds in results.items():
+        print(f"{stage:<{width}}  {seconds * 1000:10.3f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSIONE {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
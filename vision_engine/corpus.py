@@ -0,0 +1,92 @@
+import random
+import threading
+
+from vision_engine.scoring import sample_excluding
+
+
+class WordCorpus:
+    # Elenco di parole letto una sola volta, alla prima estrazione: all'avvio non si
+    # legge nulla. Le parole duplicate o vuote vengono scartate. Gli indici per
+    # lunghezza e iniziale, usati per scegliere distrattori simili, si costruiscono
+    # solo la prima volta che servono. `read`, se indicato, restituisce il testo al posto
+    # del file `path` (es. l'elenco di un pacchetto di stimoli, vedi packs.py).
+    def __init__(self, path, encoding="utf-8", read=None):
+        self.path = path
+        self.encoding = encoding
+        self.read = read
+        self._words = None
+        self._by_shape = None
+        self._by_length = None
+        # Il corpus è usato sia dal thread di Tk sia da quello di prefetch
+        self._lock = threading.Lock()
+
+    @property
+    def words(self):
+        if self._words is None:
+            with self._lock:
+                if self._words is None:
+                    if self.read is not None:
+                        lines = self.read().splitlines()
+                    else:
+                        with open(self.path, "r", encoding=self.encoding) as file:
+                            lines = file.read().splitlines()
+                    words = dict.fromkeys(map(str.strip, lines))
+                    words.pop("", None)
+                    self._words = list(words)
+        return self._words
+
+    def __len__(self):
+        return len(self.words)
+
+    def sample(self, count, exclude=(), rng=random):
+        words = self.words
+        exclude = set(exclude)
+        if count + len(exclude) > len(words):
+            raise ValueError(f"Il dizionario contiene solo {len(words)} parole.")
+        return sample_excluding(words, count, exclude, rng)
+
+    def sample_similar(self, count, targets, exclude=(), rng=random):
+        # Distrattori che assomigliano alle parole `targets`: prima stessa lunghezza e
+        # stessa iniziale, poi solo stessa lunghezza, infine parole qualsiasi
+        self._build_indexes()
+        exclude = set(exclude)
+        chosen = {}
+        targets = list(targets)
+        rng.shuffle(targets)
+
+        for target in targets * ((count // max(1, len(targets))) + 1):
+            if len(chosen) == count:
+                break
+            for bucket in (self._by_shape.get((len(target), target[:1].lower()), ()),
+                           self._by_length.get(len(target), ())):
+                word = self._draw(bucket, exclude, chosen, rng)
+                if word is not None:
+                    chosen[word] = None
+                    break
+
+        missing = count - len(chosen)
+        if missing:
+            chosen.update(dict.fromkeys(self.sample(missing, exclude | set(chosen), rng)))
+        return list(chosen)
+
+    def _draw(self, bucket, exclude, chosen, rng, attempts=8):
+        for _ in range(min(attempts, len(bucket))):
+            word = bucket[rng.randrange(len(bucket))]
+            if word not in exclude and word not in chosen:
+                return word
+        return None
+
+    def _build_indexes(self):
+        words = self.words
+        if self._by_shape is not None:
+            return
+        with self._lock:
+            if self._by_shape is not None:
+                return
+            by_shape = {}
+            by_length = {}
+            for word in words:
+                by_shape.setdefault((len(word), word[:1].lower()), []).append(word)
+                by_length.setdefault(len(word), []).append(word)
+            self._by_length = by_length
+            self._by_shape = by_shape
@@ -0,0 +1,275 @@
+import os
+import threading
+import time
+from array import array
+
+from vision_engine.records import COLUMNS, DEFAULTS, RECORD_FIELDS, RecordColumns
+
+# Profilo a cui vanno i progressi anonimi dei vecchi file progress.*
+DEFAULT_USER = "Predefinito"
+
+# Tipo SQL di ogni campo di RoundRecord, ricavato dal codice struct della colonna
+_SQL_TYPES = {code: "INTEGER" for code in "bBhHiIlLqQ"}
+_FIELD_TYPES = {name: _SQL_TYPES.get(code, "REAL") for name, code in COLUMNS if name in RECORD_FIELDS}
+
+
+class SessionDatabase:
+    # Database SQLite condiviso da tutti gli esercizi e da tutti i profili. In modalità
+    # WAL più istanze del programma possono leggere mentre una scrive; le scritture
+    # concorrenti aspettano il proprio turno (busy_timeout) invece di fallire. Gli
+    # indici su (utente, esercizio, timestamp) e (utente, timestamp) rendono lo storico
+    # di un utente una lettura di un intervallo dell'indice, anche con milioni di round.
+    # Ogni thread usa la propria connessione, come richiede sqlite3.
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # sqlite3 si importa alla prima connessione, non all'avvio del programma
+            import sqlite3
+
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Ogni transazione confermata è su disco (fsync del WAL a ogni commit): un
+            # risultato salvato non si perde nemmeno se cade la corrente. I risultati
+            # vengono scritti a blocchi da un thread a parte, quindi il costo è uno
+            # fsync per blocco e non si sente nell'interfaccia
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            self._create_schema(connection)
+        return connection
+
+    def close(self):
+        # Chiude la connessione del thread chiamante
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _create_schema(self, connection):
+        import sqlite3
+
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            fields = ", ".join(f"{name} {sql_type}" for name, sql_type in _FIELD_TYPES.items())
+            connection.executescript(f"""
+                BEGIN IMMEDIATE;
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL UNIQUE,
+                    created REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS rounds (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    exercise TEXT NOT NULL,
+                    {fields},
+                    click_times BLOB
+                );
+                CREATE INDEX IF NOT EXISTS rounds_user_exercise_time ON rounds (user_id, exercise, timestamp);
+                CREATE INDEX IF NOT EXISTS rounds_user_time ON rounds (user_id, timestamp);
+                CREATE TABLE IF NOT EXISTS imports (
+                    source TEXT PRIMARY KEY,
+                    user_id INTEGER NOT NULL REFERENCES users(id),
+                    exercise TEXT NOT NULL,
+                    rounds INTEGER NOT NULL,
+                    imported REAL NOT NULL
+                );
+                COMMIT;
+            """)
+            # Campi aggiunti a RoundRecord dopo la creazione del database
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(rounds)")}
+            for name, sql_type in _FIELD_TYPES.items():
+                if name not in existing:
+                    try:
+                        connection.execute(f"ALTER TABLE rounds ADD COLUMN {name} {sql_type}")
+                    except sqlite3.OperationalError:
+                        pass  # aggiunta nel frattempo da un'altra istanza
+            self._schema_ready = True
+
+    def users(self):
+        return [name for (name,) in self.connection().execute("SELECT name FROM users ORDER BY name")]
+
+    def user_id(self, name, create=True):
+        connection = self.connection()
+        row = connection.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        connection.execute("INSERT OR IGNORE INTO users (name, created) VALUES (?, ?)", (name, time.time()))
+        return connection.execute("SELECT id FROM users WHERE name = ?", (name,)).fetchone()[0]
+
+    def add_rounds(self, user, exercise, records):
+        # Tutti i round in un'unica transazione: un solo sync per blocco
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert_rounds(connection, self.user_id(user), exercise, records)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _insert_rounds(self, connection, user_id, exercise, records):
+        names = ", ".join(RECORD_FIELDS)
+        placeholders = ", ".join("?" * (len(RECORD_FIELDS) + 3))
+        rows = [(user_id, exercise, *(getattr(record, name) for name in RECORD_FIELDS),
+                 array("f", record.click_times).tobytes())
+                for record in records]
+        connection.executemany(
+            f"INSERT INTO rounds (user_id, exercise, {names}, click_times) VALUES ({placeholders})", rows)
+
+    def history(self, user, exercise):
+        # Lo storico di un esercizio direttamente in RecordColumns, senza creare un
+        # RoundRecord per riga: è la lettura fatta da ogni app all'avvio
+        records = RecordColumns()
+        user_id = self.user_id(user, create=False)
+        if user_id is None:
+            return records
+        cursor = self.connection().execute(
+            f"SELECT {', '.join(RECORD_FIELDS)}, click_times FROM rounds "
+            "WHERE user_id = ? AND exercise = ? ORDER BY timestamp, id", (user_id, exercise))
+        rows = cursor.fetchall()
+        if not rows:
+            return records
+        # Trasposte in colonne ed estese in blocco: molto più veloce di un append per campo
+        *values, blobs = zip(*rows)
+        for name, column in zip(RECORD_FIELDS, values):
+            if None in column:
+                default = DEFAULTS.get(name, 0)
+                column = [default if value is None else value for value in column]
+            records.columns[name].extend(column)
+        counts = [len(blob) // 4 if blob else 0 for blob in blobs]
+        offsets = records.columns["click_offset"]
+        total = 0
+        for count in counts:
+            offsets.append(total)
+            total += count
+        records.columns["click_count"].extend(counts)
+        records.clicks.frombytes(b"".join(blob for blob in blobs if blob))
+        return records
+
+    def summary(self, user):
+        # Per ogni esercizio: numero di round, stimoli ricordati e stimoli mostrati,
+        # ultimo round. Una sola query invece di leggere lo storico di ogni esercizio
+        user_id = self.user_id(user, create=False)
+        if user_id is None:
+            return {}
+        rows = self.connection().execute(
+            "SELECT exercise, COUNT(*), SUM(hits), SUM(n_initial), MAX(timestamp) "
+            "FROM rounds WHERE user_id = ? GROUP BY exercise", (user_id,))
+        return {exercise: {"rounds": count, "hits": hits, "shown": shown, "last": last}
+                for exercise, count, hits, shown, last in rows}
+
+    def import_store(self, user, exercise, store):
+        # Importa una volta sola lo storico di un ProgressStore (progress.bin, o i vecchi
+        # progress.json / progress.jsonl che lo store legge da sé). I file restano intatti.
+        # Controllo e inserimento sono nella stessa transazione: se due istanze partono
+        # insieme, solo la prima importa.
+        source = os.path.abspath(store.path)
+        connection = self.connection()
+        if connection.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone():
+            return 0
+        if not any(os.path.exists(path) for path in
+                   (store.path, store.legacy_path, os.path.splitext(store.path)[0] + ".jsonl")):
+            return 0
+        records = store.load()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone():
+                connection.execute("ROLLBACK")
+                return 0
+            user_id = self.user_id(user)
+            self._insert_rounds(connection, user_id, exercise, records)
+            connection.execute(
+                "INSERT INTO imports (source, user_id, exercise, rounds, imported) VALUES (?, ?, ?, ?, ?)",
+                (source, user_id, exercise, len(records), time.time()))
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        return len(records)
+
+
+class DatabaseProgressStore:
+    # Lo storico di un utente in un esercizio, con la stessa interfaccia di
+    # ProgressStore (len, indici, columns, remember, write): MemoryApp, ProgressWriter,
+    # ProgressView e le statistiche lo usano senza sapere dove sono salvati i dati.
+    # Lo storico viene letto una volta sola, alla prima richiesta; i round salvati nel
+    # frattempo da altre istanze con lo stesso profilo si vedono al prossimo avvio.
+    def __init__(self, database, user, exercise, legacy_store=None):
+        self.database = database
+        self.user = user
+        self.exercise = exercise
+        # ProgressStore con i progressi anonimi dell'esercizio, importati nel profilo
+        # predefinito al primo accesso al database
+        self.legacy_store = legacy_store
+        self._records = None
+        self._unwritten = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        records = self._loaded()
+        return [records[i] for i in range(len(records))]
+
+    def __len__(self):
+        return len(self._loaded())
+
+    def __getitem__(self, index):
+        records = self._loaded()
+        if index < 0:
+            index += len(records)
+        if not 0 <= index < len(records):
+            raise IndexError(index)
+        return records[index]
+
+    def columns(self):
+        return self._loaded()
+
+    def _loaded(self):
+        if self._records is None:
+            with self._lock:
+                if self._records is None:
+                    self._import_legacy()
+                    records = self.database.history(self.user, self.exercise)
+                    for record in self._unwritten:
+                        records.append(record)
+                    self._unwritten = []
+                    self._records = records
+        return self._records
+
+    def _import_legacy(self):
+        if self.legacy_store is not None:
+            self.database.import_store(DEFAULT_USER, self.exercise, self.legacy_store)
+            self.legacy_store = None
+
+    def append(self, record):
+        self.remember(record)
+        self.write([record])
+
+    def remember(self, record):
+        with self._lock:
+            if self._records is not None:
+                self._records.append(record)
+            else:
+                self._unwritten.append(record)
+
+    def write(self, records):
+        # Chiamato anche dal thread di ProgressWriter, che ha la sua connessione. Il lock
+        # evita che una prima lettura veda un round sia nel database sia tra i non scritti
+        with self._lock:
+            self._import_legacy()
+            self.database.add_rounds(self.user, self.exercise, records)
+            written = {id(record) for record in records}
+            self._unwritten = [record for record in self._unwritten if id(record) not in written]
@@ -0,0 +1,95 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+# Schermo per cui sono state pensate le dimensioni degli stimoli (font, miniature, celle)
+REFERENCE_SIZE = (1920, 1080)
+
+
+class DisplayScale:
+    # Di quanto ingrandire gli stimoli perché occupino la stessa parte di schermo che
+    # sullo schermo di riferimento: `size` è il rapporto tra le risoluzioni, `dpi` il
+    # ridimensionamento del sistema (1 = 96 DPI). Le dimensioni in pixel si moltiplicano
+    # per `size`; i font in punti anche, ma Tk li converte già in pixel secondo i DPI,
+    # quindi vanno divisi per `dpi`. I fattori sono arrotondati a 1/4, così piccole
+    # differenze tra monitor non cambiano le dimensioni.
+    __slots__ = ("size", "dpi")
+
+    def __init__(self, size=1.0, dpi=1.0):
+        self.size = size
+        self.dpi = dpi
+
+    @classmethod
+    def for_screen(cls, width, height, dpi=1.0):
+        size = min(width / REFERENCE_SIZE[0], height / REFERENCE_SIZE[1])
+        return cls(_quantize(size), _quantize(dpi))
+
+    def font(self, points):
+        return max(1, round(points * self.size / self.dpi))
+
+    def pixels(self, pixels):
+        return max(1, round(pixels * self.size))
+
+    def __eq__(self, other):
+        return isinstance(other, DisplayScale) and (self.size, self.dpi) == (other.size, other.dpi)
+
+    def __hash__(self):
+        return hash((self.size, self.dpi))
+
+    def __repr__(self):
+        return f"DisplayScale(size={self.size}, dpi={self.dpi})"
+
+
+def _quantize(factor, step=0.25, low=0.5, high=4.0):
+    return min(high, max(low, round(factor / step) * step))
+
+
+class TkDisplay:
+    # Dimensioni dello schermo e misura del testo lette da Tk. A schermo intero le
+    # dimensioni sono quelle della finestra, cioè del monitor su cui si trova: con più
+    # monitor winfo_screenwidth restituisce tutto il desktop. Finché la finestra non è
+    # visibile (o non è a schermo intero) si usano quelle dello schermo
+    def __init__(self, root):
+        self.root = root
+        self._fonts = {}
+
+    def _fullscreen(self):
+        try:
+            return bool(int(self.root.attributes("-fullscreen"))) and self.root.winfo_ismapped()
+        except (ValueError, tk.TclError):
+            return False
+
+    @property
+    def width(self):
+        if self._fullscreen() and self.root.winfo_width() > 1:
+            return self.root.winfo_width()
+        return self.root.winfo_screenwidth()
+
+    @property
+    def height(self):
+        if self._fullscreen() and self.root.winfo_height() > 1:
+            return self.root.winfo_height()
+        return self.root.winfo_screenheight()
+
+    @property
+    def scale(self):
+        # 96 pixel per pollice è il ridimensionamento 100%
+        return DisplayScale.for_screen(self.width, self.height, self.root.winfo_fpixels("1i") / 96)
+
+    def measure(self, font, text):
+        if font not in self._fonts:
+            self._fonts[font] = tkfont.Font(root=self.root, font=font)
+        return self._fonts[font].measure(text)
+
+
+class VirtualDisplay:
+    # Schermo finto per la modalità senza interfaccia: la larghezza del testo è stimata
+    # come numero di caratteri per una larghezza media di carattere (in pixel, con
+    # 1 punto = 4/3 pixel). La scala dipende solo dalla risoluzione, a 96 DPI
+    def __init__(self, width=1920, height=1080, char_width=0.6):
+        self.width = width
+        self.height = height
+        self.char_width = char_width
+        self.scale = DisplayScale.for_screen(width, height)
+
+    def measure(self, font, text):
+        return int(len(text) * abs(font[1]) * 4 / 3 * self.char_width)
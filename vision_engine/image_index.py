@@ -0,0 +1,261 @@
+import json
+import os
+import random
+import struct
+import threading
+from array import array
+
+from vision_engine.scoring import sample_excluding
+
+MAGIC = b"VIDX"
+HASH_SIZE = 8  # dHash 8x8: 64 bit per immagine
+BANDS = 4  # parti da 16 bit dell'hash usate per trovare i quasi-duplicati
+DUPLICATE_DISTANCE = BANDS - 1  # distanza di Hamming massima tra due quasi-duplicati
+RANDOM_DISTANCE = 32  # distanza media tra due immagini qualsiasi
+
+
+def dhash(path):
+    # Hash percettivo (difference hash): l'immagine in scala di grigi e ridotta a 9x8,
+    # un bit per ogni coppia di pixel adiacenti di una riga. Immagini uguali salvate in
+    # formati o dimensioni diversi hanno hash uguali o quasi.
+    from PIL import Image
+
+    with Image.open(path) as image:
+        # Per i JPEG decodifica direttamente a risoluzione ridotta
+        image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+        small = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(HASH_SIZE):
+        start = row * (HASH_SIZE + 1)
+        for column in range(start, start + HASH_SIZE):
+            value = (value << 1) | (pixels[column] < pixels[column + 1])
+    return value
+
+
+def hash_batch(paths):
+    # Eseguita nei processi di lavoro: None per i file che PIL non riesce a leggere
+    hashes = []
+    for path in paths:
+        try:
+            hashes.append(dhash(path))
+        except (OSError, SyntaxError, ValueError):
+            hashes.append(None)
+    return hashes
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class _IndexState:
+    # Fotografia immutabile dell'indice: update() ne costruisce una nuova e la
+    # sostituisce in un colpo, così chi legge da un altro thread non vede mai metà lavoro
+    def __init__(self, entries, version=None):
+        self.entries = entries  # nome -> (mtime_ns, size, hash o None)
+        self.version = version  # versione del manifest da cui è stato costruito
+        self.hashes = {name: entry[2] for name, entry in entries.items() if entry[2] is not None}
+        self.groups = self._find_duplicates()
+        # Un solo rappresentante (il primo in ordine alfabetico) per gruppo di duplicati
+        self.names = tuple(sorted(name for name in self.hashes if self.groups.get(name, (name,))[0] == name))
+        self.name_set = frozenset(self.names)
+
+    def _find_duplicates(self):
+        # Due hash a distanza <= BANDS - 1 hanno almeno una delle BANDS parti identica:
+        # basta confrontare le immagini che condividono una parte, non tutte le coppie
+        width = 64 // BANDS
+        mask = (1 << width) - 1
+        buckets = {}
+        for name, value in self.hashes.items():
+            for band in range(BANDS):
+                buckets.setdefault((band, (value >> (band * width)) & mask), []).append(name)
+
+        parent = {}
+
+        def find(name):
+            while parent.get(name, name) != name:
+                name = parent[name]
+            return name
+
+        for bucket in buckets.values():
+            for i, first in enumerate(bucket):
+                for second in bucket[i + 1:]:
+                    if hamming(self.hashes[first], self.hashes[second]) <= DUPLICATE_DISTANCE:
+                        a, b = find(first), find(second)
+                        if a != b:
+                            parent[max(a, b)] = min(a, b)
+
+        members = {}
+        for name in parent:
+            members.setdefault(find(name), []).append(name)
+        groups = {}
+        for root, names in members.items():
+            group = tuple(sorted(set(names) | {root}))
+            for name in group:
+                groups[name] = group
+        return groups
+
+
+class ImageIndex:
+    # Hash percettivi di tutte le immagini di un AssetManifest, salvati in `path` e
+    # aggiornati in modo incrementale: a ogni update() si calcolano solo gli hash dei
+    # file nuovi o modificati (mtime o dimensione diversi), in blocchi distribuiti su
+    # più processi. L'indice serve a scartare i duplicati dalla libreria e a scegliere
+    # distrattori più o meno simili alle immagini da ricordare.
+    def __init__(self, manifest, path, workers=None, batch_size=256):
+        self.manifest = manifest
+        self.path = path
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.batch_size = batch_size
+        self._state = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        # Pronto e costruito sull'elenco attuale della cartella
+        state = self._state
+        if state is None:
+            return False
+        self.manifest.refresh()
+        return state.version == self.manifest.version
+
+    def names(self):
+        # Immagini leggibili senza duplicati, in ordine alfabetico
+        return self._state.names
+
+    def duplicates(self, name):
+        # Le immagini quasi identiche a `name`, compresa `name`
+        return self._state.groups.get(name, (name,))
+
+    def update_in_background(self, on_done=None):
+        # La prima costruzione su una libreria grande richiede minuti: gira in un thread
+        # a parte e nel frattempo chi usa l'indice controlla `current()`
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._update_and_notify, args=(on_done,),
+                                                name="image-index", daemon=True)
+                self._thread.start()
+            return self._thread
+
+    def _update_and_notify(self, on_done):
+        self.update()
+        if on_done is not None:
+            on_done(self)
+
+    def update(self):
+        # Restituisce il numero di immagini di cui è stato calcolato l'hash
+        stored = self._state.entries if self._state is not None else self._load()
+        files = self.manifest.files
+        version = self.manifest.version
+        entries = {}
+        stale = []
+        for name in files:
+            try:
+                stat = os.stat(self.manifest.path(name))
+            except OSError:
+                continue
+            entry = stored.get(name)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                entries[name] = entry
+            else:
+                stale.append((name, stat.st_mtime_ns, stat.st_size))
+
+        for (name, mtime_ns, size), value in zip(stale, self._hash_all([self.manifest.path(name) for name, _, _ in stale])):
+            entries[name] = (mtime_ns, size, value)
+
+        if stale or len(entries) != len(stored):
+            self._save(entries)
+        self._state = _IndexState(entries, version)
+        return len(stale)
+
+    def _hash_all(self, paths):
+        batches = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        if len(batches) <= 1 or self.workers == 1:
+            return [value for batch in batches for value in hash_batch(batch)]
+        # "spawn" e non fork: il processo principale ha thread attivi e Tk aperto
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(batches)), mp_context=context) as pool:
+            return [value for batch in pool.map(hash_batch, batches) for value in batch]
+
+    def _load(self):
+        # nome -> (mtime_ns, size, hash); un indice illeggibile viene ricostruito da capo
+        try:
+            with open(self.path, "rb") as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    return {}
+                (header_length,) = struct.unpack("<I", file.read(4))
+                header = json.loads(file.read(header_length).decode("utf-8"))
+                names = header["names"]
+                broken = set(header["broken"])
+                columns = [array(code) for code in ("q", "q", "Q")]
+                for column in columns:
+                    column.fromfile(file, len(names))
+        except (OSError, ValueError, KeyError, EOFError, struct.error):
+            return {}
+        return {name: (mtime_ns, size, None if name in broken else value)
+                for name, mtime_ns, size, value in zip(names, *columns)}
+
+    def _save(self, entries):
+        # Scrive su un file temporaneo e lo rinomina; se non si può scrivere l'indice
+        # resta solo in memoria e verrà ricalcolato al prossimo avvio
+        names = sorted(entries)
+        header = json.dumps({
+            "names": names,
+            "broken": [name for name in names if entries[name][2] is None],
+        }).encode("utf-8")
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as file:
+                file.write(MAGIC + struct.pack("<I", len(header)) + header)
+                array("q", (entries[name][0] for name in names)).tofile(file)
+                array("q", (entries[name][1] for name in names)).tofile(file)
+                array("Q", (entries[name][2] or 0 for name in names)).tofile(file)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def sample_similar(self, count, targets, exclude=(), similarity=1.0, rng=random, pool=64):
+        # Distrattori per le immagini `targets`. Con similarity=1 per ogni bersaglio si
+        # sceglie, tra `pool` candidate estratte a caso, la più simile che non sia un suo
+        # duplicato; con valori più bassi quella la cui distanza è più vicina a una
+        # distanza che cresce fino a quella tra due immagini qualsiasi. Il costo dipende
+        # da count * pool e non dalla dimensione della libreria.
+        state = self._state
+        names = state.names
+        # I duplicati delle immagini da ricordare non possono fare da distrattori
+        exclude = {duplicate for name in set(exclude) | set(targets) for duplicate in self.duplicates(name)}
+        available = len(names) - len(exclude & state.name_set)
+        if count > available:
+            raise ValueError(f"La libreria contiene solo {available} immagini diverse da quelle iniziali.")
+
+        targets = [name for name in targets if name in state.hashes]
+        chosen = {}
+        if similarity > 0 and targets:
+            desired = DUPLICATE_DISTANCE + 1 + (1 - similarity) * (RANDOM_DISTANCE - DUPLICATE_DISTANCE - 1)
+            rng.shuffle(targets)
+            for target in targets * (count // len(targets) + 1):
+                if len(chosen) == count:
+                    break
+                target_hash = state.hashes[target]
+                best, best_gap = None, None
+                for _ in range(min(pool, available)):
+                    candidate = names[rng.randrange(len(names))]
+                    if candidate in exclude or candidate in chosen:
+                        continue
+                    gap = abs(hamming(target_hash, state.hashes[candidate]) - desired)
+                    if best is None or gap < best_gap:
+                        best, best_gap = candidate, gap
+                if best is not None:
+                    chosen[best] = None
+
+        missing = count - len(chosen)
+        if missing:
+            chosen.update(dict.fromkeys(sample_excluding(names, missing, exclude | set(chosen), rng)))
+        return list(chosen)
@@ -0,0 +1,195 @@
+import importlib
+import os
+import sys
+import tkinter as tk
+
+from vision_engine.app import MemoryApp, run
+from vision_engine.database import DEFAULT_USER, SessionDatabase
+from vision_engine.resources import database_path
+
+# Nome dell'esercizio -> (modulo del plugin, classe del provider, etichetta)
+EXERCISES = {
+    "lettere": ("character_vision.main", "LetterProvider", "Lettere"),
+    "parole": ("word_vision.main", "WordProvider", "Parole"),
+    "immagini": ("images_vision.main", "ImageProvider", "Immagini"),
+}
+# Voce del menu dei pacchetti per gli stimoli distribuiti con gli esercizi
+DEFAULT_PACK = "Predefinito"
+
+
+def load_provider(name, pack=None):
+    # I plugin vengono importati solo quando servono: PIL, per esempio, viene caricato
+    # solo se si sceglie l'esercizio con le immagini. `pack` è un pacchetto di stimoli
+    # (packs.py) da usare al posto di quelli distribuiti con l'esercizio
+    module_name, class_name, _ = EXERCISES[name]
+    module = importlib.import_module(module_name)
+    if pack is None:
+        return getattr(module, class_name)()
+    if pack.exercise != name:
+        raise ValueError(f"Il pacchetto {pack.title} è per l'esercizio {pack.exercise}, non {name}")
+    return getattr(module, class_name)(pack=pack)
+
+
+def pack_label(pack):
+    return f"{pack.title} ({EXERCISES[pack.exercise][2]})"
+
+
+class Launcher:
+    # Un'unica finestra Tk da cui si avvia qualsiasi esercizio e a cui si torna alla fine.
+    # Nel menu si sceglie (o si crea) il profilo con cui giocare; tutti gli esercizi
+    # salvano nello stesso database, separati per profilo. Un piano di sessione viene
+    # usato dall'esercizio per cui è stato generato; gli altri estraggono i round a caso.
+    # Lo stesso vale per il pacchetto di stimoli scelto nel menu (o con --pack): i
+    # pacchetti della cartella vengono elencati leggendo solo indice e manifest di
+    # ciascuno, e il contenuto si legge quando l'esercizio estrae i round
+    def __init__(self, root, exercise=None, plan=None, pack=None):
+        self.root = root
+        self.app = None
+        self.plan = plan
+        self.database = SessionDatabase(database_path())
+        self.library = None
+        self.packs = {}
+        self.user_var = tk.StringVar(value=os.environ.get("VISION_USER") or DEFAULT_USER)
+        self.new_user_var = tk.StringVar()
+        self.pack_var = tk.StringVar(value=DEFAULT_PACK)
+        if pack is not None:
+            self.packs[pack_label(pack)] = pack
+            self.pack_var.set(pack_label(pack))
+        if exercise is None:
+            self.show_menu()
+        else:
+            self.start(exercise)
+
+    def show_menu(self):
+        # Si torna al menu quando l'esercizio è già stato chiuso (MemoryApp.back)
+        self.app = None
+        self.root.title("Vision improvement")
+        font_style = ("Arial", 16)
+
+        users = self.database.users()
+        if self.user_var.get() not in users:
+            users = sorted(users + [self.user_var.get()])
+        profile = tk.Frame(self.root)
+        profile.pack(pady=10)
+        tk.Label(profile, text="Profilo:", font=font_style).pack(side="left")
+        menu = tk.OptionMenu(profile, self.user_var, *users, command=lambda _: self.update_summary())
+        menu.configure(font=font_style)
+        menu.pack(side="left", padx=10)
+        tk.Entry(profile, textvariable=self.new_user_var, font=font_style, width=12).pack(side="left")
+        tk.Button(profile, text="Nuovo profilo", command=self.add_user, font=font_style).pack(side="left", padx=10)
+
+        self.show_packs(font_style)
+        tk.Label(self.root, text="Scegli un esercizio:", font=font_style).pack(pady=10)
+        for name, (_, _, label) in EXERCISES.items():
+            tk.Button(self.root, text=label, command=lambda n=name: self.start(n), font=font_style).pack(pady=10)
+        self.summary_label = tk.Label(self.root, font=("Arial", 14), justify="left")
+        self.summary_label.pack(pady=10)
+        self.update_summary()
+
+    def show_packs(self, font_style):
+        # Il menu dei pacchetti compare solo se ce n'è almeno uno
+        from vision_engine.packs import PackLibrary
+
+        if self.library is None:
+            self.library = PackLibrary()
+        for pack in self.library.packs():
+            self.packs[pack_label(pack)] = pack
+        if not self.packs:
+            return
+        frame = tk.Frame(self.root)
+        frame.pack(pady=10)
+        tk.Label(frame, text="Pacchetto:", font=font_style).pack(side="left")
+        menu = tk.OptionMenu(frame, self.pack_var, DEFAULT_PACK, *self.packs)
+        menu.configure(font=font_style)
+        menu.pack(side="left", padx=10)
+
+    def update_summary(self):
+        # Riepilogo di tutti gli esercizi del profilo con una sola query
+        summary = self.database.summary(self.user_var.get())
+        lines = []
+        for name, (_, _, label) in EXERCISES.items():
+            totals = summary.get(name)
+            if totals and totals["shown"]:
+                lines.append(f"{label}: {totals['rounds']} round, {totals['hits'] / totals['shown']:.0%} ricordati")
+        self.summary_label.config(text="\n".join(lines) or "Nessun round giocato con questo profilo.")
+
+    def add_user(self):
+        name = self.new_user_var.get().strip()
+        if not name:
+            return
+        self.database.user_id(name)
+        self.user_var.set(name)
+        self.new_user_var.set("")
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        self.show_menu()
+
+    def flush(self):
+        if self.app is not None:
+            self.app.flush()
+
+    def close(self):
+        if self.app is not None:
+            self.app.close()
+
+    def start(self, name):
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        plan = self.plan if self.plan is not None and self.plan.exercise == name else None
+        pack = self.packs.get(self.pack_var.get())
+        if pack is not None and pack.exercise != name:
+            pack = None
+        self.app = MemoryApp(self.root, load_provider(name, pack), on_back=self.show_menu,
+                             user=self.user_var.get(), database=self.database, plan=plan)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # --startup-report stampa i tempi di avvio, --startup-check chiude la finestra
+    # appena disegnata ed esce con 1 se l'avvio ha superato il budget; --plan=FILE
+    # gioca i round di un piano generato con `python -m vision_engine.plans`;
+    # --profile stampa all'uscita la durata delle callback di Tk e i blocchi del ciclo
+    # degli eventi, --profile=FILE ne salva anche la traccia; --pack=NOME (o un file)
+    # usa un pacchetto di stimoli al posto di quelli distribuiti
+    plan_path = os.environ.get("VISION_PLAN")
+    profile = pack_name = None
+    for arg in argv:
+        if arg.startswith("--plan="):
+            plan_path = arg[len("--plan="):]
+        elif arg.startswith("--profile="):
+            profile = arg[len("--profile="):]
+        elif arg.startswith("--pack="):
+            pack_name = arg[len("--pack="):]
+    flags = {arg for arg in argv if arg.startswith("--") and not arg.startswith(("--plan=", "--profile=", "--pack="))}
+    if "--profile" in flags:
+        profile = True
+    unknown = flags - {"--startup-report", "--startup-check", "--profile"}
+    if unknown:
+        sys.exit(f"Opzione sconosciuta: {', '.join(sorted(unknown))}")
+    names = [arg for arg in argv if not arg.startswith("--")]
+    exercise = names[0] if names else None
+    if exercise is not None and exercise not in EXERCISES:
+        sys.exit(f"Esercizio sconosciuto: {exercise}. Scegli tra: {', '.join(EXERCISES)}")
+    plan = None
+    if plan_path:
+        from vision_engine.plans import SessionPlan
+
+        try:
+            plan = SessionPlan(plan_path)
+        except (OSError, ValueError) as error:
+            sys.exit(f"Piano di sessione non valido: {error}")
+    pack = None
+    if pack_name:
+        from vision_engine.packs import PackError, open_pack
+
+        try:
+            pack = open_pack(pack_name)
+        except (OSError, PackError) as error:
+            sys.exit(f"Pacchetto non valido: {error}")
+    run(lambda root: Launcher(root, exercise, plan, pack),
+        startup_report="--startup-report" in flags or None,
+        startup_check="--startup-check" in flags, profile=profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from vision_engine.websocket import connect
+
+
+def percentile(samples, fraction):
+    # Percentile con il metodo nearest-rank su campioni già ordinati
+    if not samples:
+        return float("nan")
+    return samples[max(0, math.ceil(fraction * len(samples)) - 1)]
+
+
+async def http_get(reader, writer, host, path):
+    # Una GET su una connessione keep-alive già aperta; restituisce (stato, corpo)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status = int(head.split(" ", 2)[1])
+    length = 0
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def simulated_user(host, port, user, args, latencies, rng):
+    # Un utente che gioca `args.rounds` round di fila, senza pause: il tempo di
+    # esposizione non viene atteso, così si misura solo il server
+    socket = await connect(host, port)
+    http = None
+    try:
+        await socket.send(json.dumps({"type": "hello", "user": user}))
+        await socket.receive()
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            await socket.send(json.dumps({"type": "round", "exercise": args.exercise, "time": 1.0,
+                                          "initial": args.initial, "final": args.final,
+                                          "width": args.width, "height": args.height}))
+            reply = json.loads(await socket.receive())
+            latencies["round"].append(time.perf_counter() - start)
+            if reply["type"] == "error":
+                raise RuntimeError(reply["message"])
+
+            if args.thumbnails and "urls" in reply:
+                if http is None:
+                    http = await asyncio.open_connection(host, port)
+                for url in reply["urls"].values():
+                    start = time.perf_counter()
+                    status, _ = await http_get(*http, host, url)
+                    latencies["thumbnail"].append(time.perf_counter() - start)
+                    if status != 200:
+                        raise RuntimeError(f"GET {url}: {status}")
+
+            initial = {stimulus["item"] for stimulus in reply["initial"]}
+            selected = [item for item in reply["final"] if rng.random() < (0.8 if item in initial else 0.1)]
+            start = time.perf_counter()
+            await socket.send(json.dumps({"type": "answer", "id": reply["id"], "selected": selected,
+                                          "submit_time": 1.0, "click_times": [0.5] * len(selected)}))
+            result = json.loads(await socket.receive())
+            latencies["answer"].append(time.perf_counter() - start)
+            if result["type"] == "error":
+                raise RuntimeError(result["message"])
+    finally:
+        await socket.close()
+        if http is not None:
+            http[1].close()
+
+
+async def run_load(host, port, args):
+    latencies = {"round": [], "answer": [], "thumbnail": []}
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    # Tutti gli utenti collegati insieme, ognuno con la sua connessione WebSocket
+    results = await asyncio.gather(
+        *(simulated_user(host, port, f"carico-{i}", args, latencies, random.Random(rng.random()))
+          for i in range(args.clients)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    errors = [result for result in results if isinstance(result, BaseException)]
+    return latencies, elapsed, errors
+
+
+def start_server(exercise, data_dir):
+    # Il server gira in un processo a parte, con dati e database temporanei, così il
+    # carico dei client non gli ruba il GIL e non si toccano i progressi veri
+    env = dict(os.environ, VISION_DATA_DIR=data_dir)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "vision_engine.server", "--port", "0", "--exercise", exercise,
+         "--database", os.path.join(data_dir, "sessions.db")],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("In ascolto su "):
+        process.kill()
+        raise RuntimeError("Il server non è partito")
+    return process, int(line.rsplit(":", 1)[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test di carico del server degli esercizi su localhost.")
+    parser.add_argument("--exercise", default="lettere")
+    parser.add_argument("--clients", type=int, default=200, help="utenti simultanei")
+    parser.add_argument("--rounds", type=int, default=20, help="round per utente")
+    parser.add_argument("--initial", type=int, default=5)
+    parser.add_argument("--final", type=int, default=10)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--thumbnails", action="store_true", help="scarica anche le miniature di ogni round")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="server già avviato; di default se ne avvia uno temporaneo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="salva i risultati in questo file")
+    args = parser.parse_args(argv)
+
+    process = data_dir = None
+    port = args.port
+    if port is None:
+        data_dir = tempfile.mkdtemp(prefix="vision-load-")
+        process, port = start_server(args.exercise, data_dir)
+    try:
+        latencies, elapsed, errors = asyncio.run(run_load(args.host, port, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    rounds = len(latencies["answer"])
+    print(f"{args.exercise}: {args.clients} utenti, {rounds} round in {elapsed:.2f} s "
+          f"({rounds / elapsed:.0f} round/s), {len(errors)} errori")
+    report = {}
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        samples.sort()
+        report[name] = {"p50": percentile(samples, 0.5), "p99": percentile(samples, 0.99), "max": samples[-1]}
+        print(f"{name:<10} p50 {report[name]['p50'] * 1000:8.2f} ms   p99 {report[name]['p99'] * 1000:8.2f} ms"
+              f"   max {samples[-1] * 1000:8.2f} ms")
+    for error in errors[:5]:
+        print(f"ERRORE {error!r}", file=sys.stderr)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"clients": args.clients, "rounds": rounds, "elapsed": elapsed,
+                       "errors": len(errors), "latency": report}, file, indent=2)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
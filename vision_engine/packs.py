@@ -0,0 +1,259 @@
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import threading
+import zipfile
+
+from vision_engine.resources import IMAGE_EXTENSIONS, AssetManifest, packs_dir
+from vision_engine.scoring import sample_excluding
+
+# Un pacchetto di stimoli è un archivio zip con un manifest `pack.json`:
+#   {"exercise": "lettere" | "parole" | "immagini", "title": "...", "count": N,
+#    "font": ["Famiglia", punti]}   (font facoltativo, per lettere e parole)
+# e gli stimoli in `glyphs.txt` (un glifo Unicode per riga), `words.txt` (una parola
+# per riga) o nella cartella `images/`. L'indice dello zip (la directory centrale) dice
+# dove sta ogni file: aprire un pacchetto legge solo l'indice e il manifest, e di
+# un'immagine si legge e decodifica solo il membro che serve.
+MANIFEST = "pack.json"
+PACK_EXTENSIONS = frozenset({".zip", ".vpack"})
+ITEM_MEMBERS = {"lettere": "glyphs.txt", "parole": "words.txt"}
+IMAGES_PREFIX = "images/"
+
+
+class PackError(ValueError):
+    pass
+
+
+class StimulusPack:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        stat = os.stat(self.path)
+        self.stamp = f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+        self._archive = None
+        # zipfile non permette letture in parallelo dallo stesso file
+        self._lock = threading.Lock()
+        try:
+            info = json.loads(self.read(MANIFEST).decode("utf-8"))
+        except (KeyError, ValueError, zipfile.BadZipFile) as error:
+            self.close()
+            raise PackError(f"{path} non è un pacchetto di stimoli valido: {error}")
+        self.exercise = info.get("exercise")
+        if self.exercise not in ("lettere", "parole", "immagini"):
+            self.close()
+            raise PackError(f"{path}: esercizio sconosciuto {self.exercise!r}")
+        self.title = info.get("title") or self.name
+        self.count = info.get("count")
+        self.font = tuple(info["font"]) if info.get("font") else None
+        self._items = None
+
+    def archive(self):
+        if self._archive is None:
+            self._archive = zipfile.ZipFile(self.path)
+        return self._archive
+
+    def read(self, member):
+        with self._lock:
+            return self.archive().read(member)
+
+    def items(self):
+        # Glifi o parole (senza doppioni, nell'ordine del file) oppure i nomi delle
+        # immagini, presi dall'indice dello zip senza leggerne il contenuto
+        if self._items is None:
+            if self.exercise == "immagini":
+                with self._lock:
+                    members = self.archive().namelist()
+                items = sorted(
+                    member[len(IMAGES_PREFIX):] for member in members
+                    if member.startswith(IMAGES_PREFIX) and not member.endswith("/")
+                    and os.path.splitext(member)[1].lower() in IMAGE_EXTENSIONS)
+            else:
+                lines = self.read(ITEM_MEMBERS[self.exercise]).decode("utf-8").splitlines()
+                items = dict.fromkeys(map(str.strip, lines))
+                items.pop("", None)
+                items = list(items)
+            self._items = items
+        return self._items
+
+    def read_text(self):
+        return self.read(ITEM_MEMBERS[self.exercise]).decode("utf-8")
+
+    def manifest(self):
+        return PackManifest(self)
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+
+class PackMember:
+    # Un'immagine dentro un pacchetto, come la vuole ThumbnailCache: una chiave unica,
+    # un'impronta che cambia se cambia il contenuto e il file da decodificare
+    __slots__ = ("pack", "member", "key", "stamp")
+
+    def __init__(self, pack, member):
+        self.pack = pack
+        self.member = member
+        self.key = f"{pack.path}/{member}"
+        with pack._lock:
+            info = pack.archive().getinfo(member)
+        self.stamp = f"{pack.stamp}:{info.CRC:x}"
+
+    def open(self):
+        return io.BytesIO(self.pack.read(self.member))
+
+
+class PackManifest:
+    # Le immagini di un pacchetto con l'interfaccia di AssetManifest: ImageProvider e
+    # il server le usano senza sapere se vengono da una cartella o da un archivio
+    version = 1
+
+    def __init__(self, pack):
+        self.pack = pack
+        self.directory = pack.path
+        self._names = None
+
+    @property
+    def files(self):
+        return self.pack.items()
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, name):
+        if self._names is None:
+            self._names = frozenset(self.files)
+        return name in self._names
+
+    def refresh(self, force=False):
+        # L'archivio non cambia mentre è aperto
+        return False
+
+    def path(self, name):
+        return f"{self.pack.path}/{IMAGES_PREFIX}{name}"
+
+    def source(self, name):
+        return PackMember(self.pack, IMAGES_PREFIX + name)
+
+    def stamp(self, name):
+        return self.source(name).stamp
+
+    def sample(self, count, exclude=(), rng=random):
+        files = self.files
+        exclude = set(exclude)
+        if count + len(exclude & set(files)) > len(files):
+            raise ValueError(f"Il pacchetto {self.pack.title} contiene solo {len(files)} immagini.")
+        return sample_excluding(files, count, exclude, rng)
+
+
+class PackLibrary:
+    # I pacchetti di una cartella. L'elenco dei file viene da un AssetManifest (riletto
+    # solo se la cartella cambia) e ogni pacchetto viene aperto una volta, leggendone
+    # indice e manifest, finché il file non cambia: cambiare pacchetto non rilegge
+    # gli altri. I file non validi vengono ignorati.
+    def __init__(self, directory=None):
+        self.manifest = AssetManifest(directory or packs_dir(), PACK_EXTENSIONS)
+        self._packs = {}
+
+    def packs(self, exercise=None):
+        packs = []
+        for filename in self.manifest.files:
+            pack = self._open(filename)
+            if pack is not None and (exercise is None or pack.exercise == exercise):
+                packs.append(pack)
+        return packs
+
+    def get(self, name):
+        # Per nome (senza estensione) o per nome del file
+        for pack in self.packs():
+            if name in (pack.name, os.path.basename(pack.path)):
+                return pack
+        return None
+
+    def _open(self, filename):
+        path = self.manifest.path(filename)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+        cached = self._packs.get(filename)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        try:
+            pack = StimulusPack(path)
+        except (OSError, PackError) as error:
+            print(f"Pacchetto ignorato: {error}", file=sys.stderr)
+            pack = None
+        self._packs[filename] = pack
+        return pack
+
+
+def open_pack(name_or_path):
+    # Un file, o il nome di un pacchetto nella cartella dei pacchetti
+    if os.path.isfile(name_or_path):
+        return StimulusPack(name_or_path)
+    pack = PackLibrary().get(name_or_path)
+    if pack is None:
+        raise PackError(f"Pacchetto non trovato: {name_or_path}")
+    return pack
+
+
+def build_pack(output, exercise, source, title=None, font=None):
+    # `source` è un file di testo (un glifo o una parola per riga) per lettere e
+    # parole, una cartella di immagini per le immagini
+    if exercise == "immagini":
+        names = sorted(name for name in os.listdir(source)
+                       if not name.startswith(".") and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)
+        count = len(names)
+    else:
+        with open(source, "r", encoding="utf-8") as file:
+            items = dict.fromkeys(map(str.strip, file.read().splitlines()))
+        items.pop("", None)
+        count = len(items)
+    info = {"exercise": exercise, "title": title or os.path.splitext(os.path.basename(output))[0], "count": count}
+    if font:
+        info["font"] = list(font)
+
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp_path, "w") as archive:
+        # Il manifest per primo; le immagini sono già compresse e restano così come sono
+        archive.writestr(MANIFEST, json.dumps(info, ensure_ascii=False, indent=2), zipfile.ZIP_DEFLATED)
+        if exercise == "immagini":
+            for name in names:
+                archive.write(os.path.join(source, name), IMAGES_PREFIX + name, zipfile.ZIP_STORED)
+        else:
+            archive.writestr(ITEM_MEMBERS[exercise], "\n".join(items) + "\n", zipfile.ZIP_DEFLATED)
+    os.replace(tmp_path, output)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crea ed elenca i pacchetti di stimoli.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="crea un pacchetto")
+    build.add_argument("exercise", choices=["lettere", "parole", "immagini"])
+    build.add_argument("source", help="file di testo (lettere, parole) o cartella di immagini")
+    build.add_argument("output", help="archivio da scrivere, es. packs/cirillico.zip")
+    build.add_argument("--title")
+    build.add_argument("--font", nargs=2, metavar=("FAMIGLIA", "PUNTI"), help="font per lettere e parole")
+    listing = commands.add_parser("list", help="elenca i pacchetti di una cartella")
+    listing.add_argument("directory", nargs="?", default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        font = (args.font[0], int(args.font[1])) if args.font else None
+        count = build_pack(args.output, args.exercise, args.source, args.title, font)
+        print(f"{args.output}: {count} stimoli ({args.exercise})")
+    else:
+        library = PackLibrary(args.directory)
+        for pack in library.packs():
+            print(f"{pack.name:<24} {pack.exercise:<10} {pack.count if pack.count is not None else '?':>8}  {pack.title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import queue
+import threading
+
+from vision_engine.records import RoundRecord
+
+_STOP = object()
+
+
+class ProgressWriter:
+    # Salva i risultati in un thread separato, così check_results non aspetta mai il
+    # disco. I risultati finiscono subito nello storico in memoria (la finestra dei
+    # progressi li vede) e in una coda limitata; il thread li scrive a blocchi, con un
+    # solo fsync per blocco. Se una scrittura fallisce il blocco viene riprovato alla
+    # scrittura successiva e l'errore viene passato a `on_error` nel thread di Tk.
+    def __init__(self, store, root, on_error=None, max_pending=256, batch_size=64, poll_ms=200):
+        self.store = store
+        self.root = root
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.poll_ms = poll_ms
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._errors = queue.SimpleQueue()
+        self._failed = []
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        self._poll_id = root.after(poll_ms, self._poll_errors)
+
+    def submit(self, record):
+        self.store.remember(record)
+        # Se la coda è piena (disco molto lento) si aspetta: meglio rallentare che perdere dati
+        self._queue.put(record)
+
+    def flush(self, timeout=5.0):
+        # Attende che tutto ciò che è in coda sia stato scritto (o che la scrittura fallisca).
+        # Dopo close() il thread non c'è più e non resta niente da aspettare
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        if self._closed:
+            return True
+        flushed = self.flush(timeout)
+        self._closed = True
+        self._queue.put(_STOP)
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+        return flushed
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [record for record in batch if isinstance(record, RoundRecord)]
+            if records or self._failed:
+                self._write(self._failed + records)
+
+            for marker in batch:
+                if isinstance(marker, threading.Event):
+                    marker.set()
+            if _STOP in batch:
+                return
+
+    def _write(self, records):
+        try:
+            self.store.write(records)
+            self._failed = []
+        except Exception as exc:
+            # Non solo OSError: con il database anche sqlite3.Error (es. "database is
+            # locked" quando un'altra istanza tiene la scrittura oltre il timeout). Il
+            # thread deve restare vivo, altrimenti la coda si riempie e submit blocca Tk
+            self._failed = records
+            self._errors.put(exc)
+
+    def _poll_errors(self):
+        while True:
+            try:
+                exc = self._errors.get_nowait()
+            except queue.Empty:
+                break
+            if self.on_error is not None:
+                self.on_error(exc)
+        self._poll_id = self.root.after(self.poll_ms, self._poll_errors)
@@ -0,0 +1,59 @@
+import random
+
+
+class PlacementError(ValueError):
+    pass
+
+
+class GridPlacer:
+    # Divide lo schermo in celle grandi quanto un elemento più lo spazio minimo tra
+    # due elementi, poi assegna a ogni elemento una cella diversa estratta a caso.
+    # Ogni elemento resta dentro la propria cella (con un piccolo spostamento casuale),
+    # quindi due elementi non si sovrappongono mai e il piazzamento di n elementi
+    # costa O(n). Fino a `capacity` elementi il piazzamento è sempre garantito.
+    def __init__(self, width, height, item_width, item_height, gap=0, margin=100):
+        self.width = width
+        self.height = height
+        self.item_width = item_width
+        self.item_height = item_height
+        self.gap = gap
+        self.margin = margin
+
+        usable_width = max(0, width - 2 * margin)
+        usable_height = max(0, height - 2 * margin)
+        self.columns = int(usable_width // (item_width + gap))
+        self.rows = int(usable_height // (item_height + gap))
+
+        # Lo spazio avanzato viene distribuito tra le celle, così gli elementi
+        # occupano tutto lo schermo e non solo l'angolo in alto a sinistra
+        self.cell_width = usable_width / self.columns if self.columns else 0
+        self.cell_height = usable_height / self.rows if self.rows else 0
+
+    @property
+    def capacity(self):
+        return self.columns * self.rows
+
+    @property
+    def jitter(self):
+        # Spostamento massimo dal centro della cella, in x e in y: metà dello spazio
+        # che avanza dopo l'elemento e `gap`, così due elementi vicini restano sempre
+        # ad almeno `gap` pixel
+        return (max(0.0, (self.cell_width - self.item_width - self.gap) / 2),
+                max(0.0, (self.cell_height - self.item_height - self.gap) / 2))
+
+    def place(self, count, rng=random):
+        if count > self.capacity:
+            raise PlacementError(
+                f"Impossibile posizionare {count} elementi: lo schermo ne può contenere al massimo {self.capacity}.")
+
+        free_x, free_y = self.jitter
+
+        positions = []
+        for cell in rng.sample(range(self.capacity), count):
+            row, column = divmod(cell, self.columns)
+            center_x = self.margin + (column + 0.5) * self.cell_width
+            center_y = self.margin + (row + 0.5) * self.cell_height
+            x = center_x + rng.uniform(-free_x, free_x)
+            y = center_y + rng.uniform(-free_y, free_y)
+            positions.append((int(x), int(y)))
+        return positions
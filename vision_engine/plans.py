@@ -0,0 +1,211 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from vision_engine.display import VirtualDisplay
+
+MAGIC = b"VPLN"
+
+
+class PlanRound:
+    # Un round di un piano: stimoli iniziali, griglia finale già mescolata e posizioni
+    # degli stimoli iniziali, calcolate per celle grandi `item_size`
+    __slots__ = ("index", "items_initial", "items_final", "positions", "item_size")
+
+    def __init__(self, index, items_initial, items_final, positions, item_size):
+        self.index = index
+        self.items_initial = items_initial
+        self.items_final = items_final
+        self.positions = positions
+        self.item_size = item_size
+
+
+def _row_format(num_initial, num_final):
+    # Indici nel vocabolario degli stimoli iniziali e della griglia finale, posizioni
+    # (x, y) degli iniziali, larghezza e altezza degli stimoli usate per piazzarli
+    return struct.Struct(f"<{num_initial}I{num_final}I{2 * num_initial}h2H")
+
+
+class SessionPlan:
+    # Piano di sessione generato offline da generate_plan e letto con mmap: ogni round
+    # ha la stessa dimensione in byte, quindi leggerne uno è un calcolo di offset e un
+    # solo unpack, qualunque sia la lunghezza del piano, e il file non viene mai
+    # caricato tutto in memoria. Non richiede NumPy.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:4] != MAGIC:
+                raise ValueError(f"{path} non è un piano di sessione")
+            (header_size,) = struct.unpack_from("<I", self._map, 4)
+            header = json.loads(self._map[8:8 + header_size].decode("utf-8"))
+        except (ValueError, struct.error):
+            self.close()
+            raise
+        self.exercise = header["exercise"]
+        self.seed = header["seed"]
+        self.num_initial = header["num_initial"]
+        self.num_final = header["num_final"]
+        self.display_size = tuple(header["display"])
+        self.vocabulary = header["vocabulary"]
+        self._row = _row_format(self.num_initial, self.num_final)
+        self._body = 8 + header_size
+        # Identità del piano, salvata con ogni round giocato: il CRC dell'intestazione
+        # (esercizio, seme, dimensioni, vocabolario), mai 0 che indica "senza piano"
+        self.plan_id = zlib.crc32(self._map[:self._body]) or 1
+        self._count = min(header["rounds"], (len(self._map) - self._body) // self._row.size)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        values = self._row.unpack_from(self._map, self._body + index * self._row.size)
+        n, m = self.num_initial, self.num_final
+        vocabulary = self.vocabulary
+        coordinates = values[n + m:n + m + 2 * n]
+        return PlanRound(
+            index,
+            [vocabulary[i] for i in values[:n]],
+            [vocabulary[i] for i in values[n:n + m]],
+            list(zip(coordinates[::2], coordinates[1::2])),
+            values[-2:],
+        )
+
+    def positions_for(self, plan_round, display, placer):
+        # Le posizioni salvate valgono solo su uno schermo delle stesse dimensioni e se
+        # gli stimoli veri non sono più grandi delle celle del piano (per le parole la
+        # larghezza misurata da Tk può essere diversa da quella stimata offline)
+        if (display.width, display.height) != self.display_size:
+            return None
+        if placer.item_width > plan_round.item_size[0] or placer.item_height > plan_round.item_size[1]:
+            return None
+        return plan_round.positions
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def generate_plan(provider, rounds, num_initial, num_final, seed=None, display=None):
+    # Genera `rounds` round con NumPy, tutti insieme: per ogni round un sottoinsieme
+    # casuale del vocabolario (argpartition di numeri casuali) da cui si prendono gli
+    # stimoli iniziali e i distrattori, una permutazione per mescolare la griglia finale e,
+    # per ogni geometria di piazzamento, le celle e gli spostamenti di tutti i round
+    # che la condividono. Restituisce (vocabolario, array strutturato dei round).
+    import numpy as np
+
+    display = display or VirtualDisplay()
+    vocabulary = list(provider.vocabulary())
+    if not 1 <= num_initial <= num_final <= len(vocabulary):
+        raise ValueError(f"Servono 1 <= iniziali <= finali <= {len(vocabulary)} stimoli.")
+    rng = np.random.default_rng(seed)
+
+    if len(vocabulary) <= 4096:
+        chosen = np.argpartition(rng.random((rounds, len(vocabulary))), num_final - 1, axis=1)[:, :num_final]
+    else:
+        # Con vocabolari grandi (librerie di immagini) una matrice rounds x vocabolario
+        # non sta in memoria: si estrae round per round
+        chosen = np.stack([rng.choice(len(vocabulary), num_final, replace=False) for _ in range(rounds)])
+    # argpartition non restituisce un ordine casuale: si mescola prima di dividere
+    chosen = np.take_along_axis(chosen, np.argsort(rng.random(chosen.shape), axis=1), axis=1)
+    initial = chosen[:, :num_initial]
+    final = np.take_along_axis(chosen, np.argsort(rng.random(chosen.shape), axis=1), axis=1)
+
+    # Il piazzamento dipende dagli stimoli (per le parole dalla più larga): i round
+    # vengono raggruppati per geometria e ogni gruppo è piazzato in blocco
+    groups = {}
+    for index in range(rounds):
+        placer = provider.placer(display, [vocabulary[i] for i in initial[index]])
+        key = (placer.item_width, placer.item_height)
+        groups.setdefault(key, (placer, []))[1].append(index)
+
+    dtype = np.dtype([
+        ("initial", "<u4", (num_initial,)),
+        ("final", "<u4", (num_final,)),
+        ("positions", "<i2", (num_initial, 2)),
+        ("item_size", "<u2", (2,)),
+    ])
+    plan = np.zeros(rounds, dtype)
+    plan["initial"] = initial
+    plan["final"] = final
+    for (item_width, item_height), (placer, indices) in groups.items():
+        if num_initial > placer.capacity:
+            raise ValueError(f"Lo schermo può contenere al massimo {placer.capacity} stimoli iniziali.")
+        indices = np.asarray(indices)
+        cells = np.argpartition(rng.random((len(indices), placer.capacity)), num_initial - 1, axis=1)[:, :num_initial]
+        row, column = np.divmod(cells, placer.columns)
+        free_x, free_y = placer.jitter
+        x = placer.margin + (column + 0.5) * placer.cell_width + rng.uniform(-free_x, free_x, cells.shape)
+        y = placer.margin + (row + 0.5) * placer.cell_height + rng.uniform(-free_y, free_y, cells.shape)
+        plan["positions"][indices] = np.stack([x, y], axis=-1).astype(np.int16)
+        plan["item_size"][indices] = (item_width, item_height)
+    return vocabulary, plan
+
+
+def write_plan(path, exercise, vocabulary, plan, seed, display):
+    num_initial = plan.dtype["initial"].shape[0]
+    num_final = plan.dtype["final"].shape[0]
+    header = json.dumps({
+        "exercise": exercise,
+        "seed": seed,
+        "rounds": len(plan),
+        "num_initial": num_initial,
+        "num_final": num_final,
+        "display": [display.width, display.height],
+        "vocabulary": vocabulary,
+    }).encode("utf-8")
+    # L'array strutturato ha già il layout di _row_format: lo si scrive così com'è
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        file.write(plan.tobytes())
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    from vision_engine.launcher import EXERCISES, load_provider
+    from vision_engine.packs import PackError, open_pack
+
+    parser = argparse.ArgumentParser(description="Genera un piano di sessione riproducibile per un esercizio.")
+    parser.add_argument("exercise", choices=list(EXERCISES))
+    parser.add_argument("output", help="file del piano da scrivere")
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--initial", type=int, default=5)
+    parser.add_argument("--final", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--width", type=int, default=1920, help="larghezza dello schermo su cui verrà usato")
+    parser.add_argument("--height", type=int, default=1080, help="altezza dello schermo su cui verrà usato")
+    parser.add_argument("--pack", help="pacchetto di stimoli (file o nome) al posto di quelli distribuiti")
+    args = parser.parse_args(argv)
+    pack = None
+    if args.pack:
+        try:
+            pack = open_pack(args.pack)
+        except (OSError, PackError) as error:
+            parser.error(str(error))
+        if pack.exercise != args.exercise:
+            parser.error(f"il pacchetto è per l'esercizio {pack.exercise}")
+
+    provider = load_provider(args.exercise, pack)
+    display = VirtualDisplay(args.width, args.height)
+    start = time.perf_counter()
+    vocabulary, plan = generate_plan(provider, args.rounds, args.initial, args.final, args.seed, display)
+    write_plan(args.output, args.exercise, vocabulary, plan, args.seed, display)
+    elapsed = time.perf_counter() - start
+    print(f"{args.exercise}: {len(plan)} round in {elapsed:.3f} s, "
+          f"{os.path.getsize(args.output)} byte in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import queue
+import threading
+
+
+class PrefetchTask:
+    # Risultato di un lavoro in background, letto dal thread di Tk con done()/result().
+    # Basta questo: concurrent.futures si porterebbe dietro logging e rallenterebbe l'avvio
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        self.cancelled = False
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def run(self):
+        try:
+            self._result = self.function(*self.args)
+        except BaseException as exc:
+            self._error = exc
+        finally:
+            self._done.set()
+
+    def cancel(self):
+        self.cancelled = True
+        self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class Prefetcher:
+    # Prepara in un thread di lavoro i dati della schermata successiva mentre l'utente
+    # memorizza gli stimoli. Tk non è thread-safe: il thread produce solo dati (liste,
+    # immagini PIL) e i widget vengono creati nel thread di Tk quando il risultato è pronto.
+    # Il thread parte solo al primo lavoro, così non pesa sull'apertura della finestra.
+    def __init__(self, root, poll_ms=10):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, function, *args):
+        if self._closed:
+            raise RuntimeError("Prefetcher chiuso")
+        task = PrefetchTask(function, args)
+        self._queue.put(task)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name="prefetch", daemon=True)
+            self._thread.start()
+        return task
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            if not task.cancelled:
+                task.run()
+
+    def when_ready(self, future, callback, on_error=None):
+        # Da chiamare nel thread di Tk: se il lavoro non è ancora finito riprova poco
+        # dopo, senza bloccare il mainloop. Dopo shutdown() i risultati vengono ignorati:
+        # la schermata a cui erano destinati non c'è più. Se il lavoro è fallito
+        # l'eccezione va a `on_error`, che la mostra all'utente; senza, viene rilanciata
+        if self._closed or future.cancelled:
+            return
+        if not future.done():
+            self.root.after(self.poll_ms, self.when_ready, future, callback, on_error)
+            return
+        try:
+            result = future.result()
+        except Exception as error:
+            if on_error is None:
+                raise
+            on_error(error)
+            return
+        callback(result)
+
+    def shutdown(self):
+        # Il lavoro già avviato termina da solo, quello in coda viene scartato
+        if self._closed:
+            return
+        self._closed = True
+        while True:
+            try:
+                task = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task.cancel()
+        self._queue.put(None)
@@ -0,0 +1,204 @@
+import json
+import os
+import struct
+import threading
+
+from vision_engine.records import COLUMNS, DEFAULTS, RECORD_FIELDS, RecordColumns, RoundRecord
+
+MAGIC = b"VPRG"
+
+
+class ProgressStore:
+    # Storico dei progressi in formato binario a righe fisse, una per round, aggiunte in
+    # coda e sincronizzate con fsync: salvare costa O(1) qualunque sia la lunghezza
+    # dello storico e leggerlo significa decodificare un unico blocco di byte.
+    # L'intestazione del file elenca le colonne: un file scritto con colonne diverse
+    # viene letto lo stesso (le colonne mancanti prendono il valore di default) e
+    # riscritto nel formato attuale alla prima scrittura.
+    # I tempi dei clic, di lunghezza variabile, sono in un file a parte (.clicks) di
+    # float32, a cui ogni riga rimanda con posizione e numero.
+    # Un crash può al massimo lasciare una riga a metà, che viene ignorata e poi
+    # sovrascritta. Finché progress.bin non esiste lo storico viene letto, solo in
+    # memoria, dai vecchi progress.jsonl o progress.json, che restano intatti; la prima
+    # scrittura lo copia nel file nuovo.
+    def __init__(self, path="progress.bin", legacy_path="progress.json"):
+        self.path = path
+        self.clicks_path = os.path.splitext(path)[0] + ".clicks"
+        self.legacy_path = legacy_path
+        self._records = None
+        self._file_checked = False
+        self._row = struct.Struct("<" + "".join(code for _, code in COLUMNS))
+        # Risultati già in memoria ma non ancora scritti da ProgressWriter
+        self._unwritten = []
+        self._lock = threading.Lock()
+
+    def load(self):
+        records = self._loaded()
+        return [records[i] for i in range(len(records))]
+
+    def __len__(self):
+        return len(self._loaded())
+
+    def __getitem__(self, index):
+        records = self._loaded()
+        if index < 0:
+            index += len(records)
+        if not 0 <= index < len(records):
+            raise IndexError(index)
+        return records[index]
+
+    def columns(self):
+        # Lo storico come RecordColumns, per i calcoli in blocco
+        return self._loaded()
+
+    def _loaded(self):
+        # Lo storico viene letto una volta sola, poi è aggiornato a ogni append
+        if self._records is None:
+            with self._lock:
+                records = self._read()[0] if os.path.exists(self.path) else self._read_legacy()
+                for record in self._unwritten:
+                    records.append(record)
+                self._unwritten = []
+                self._records = records
+        return self._records
+
+    def append(self, record):
+        self.remember(record)
+        self.write([record])
+
+    def remember(self, record):
+        # Aggiunge il risultato allo storico in memoria; la scrittura su disco è a parte
+        with self._lock:
+            if self._records is not None:
+                self._records.append(record)
+            else:
+                self._unwritten.append(record)
+
+    def write(self, records):
+        # Scrive più risultati con un solo fsync. Può essere chiamato da un altro thread.
+        with self._lock:
+            if not self._file_checked:
+                if os.path.exists(self.path):
+                    self._prepare_file()
+                else:
+                    self._rewrite(self._read_legacy())
+                self._file_checked = True
+            self._append_rows(self.path, self.clicks_path, records)
+            written = {id(record) for record in records}
+            self._unwritten = [record for record in self._unwritten if id(record) not in written]
+
+    def _header(self):
+        header = json.dumps({"columns": COLUMNS}).encode("utf-8")
+        return MAGIC + struct.pack("<H", len(header)) + header
+
+    def _prepare_file(self):
+        # Prima scrittura della sessione: il file viene creato, aggiornato al formato
+        # attuale se ha colonne diverse, oppure ripulito da una riga lasciata a metà
+        try:
+            with open(self.path, "rb") as file:
+                file_columns, header_size = self._read_header(file.read(6), file)
+                size = file.seek(0, os.SEEK_END)
+        except FileNotFoundError:
+            file_columns = None
+        if file_columns != [tuple(column) for column in COLUMNS]:
+            self._rewrite(self._read()[0])
+            return
+        whole = header_size + (size - header_size) // self._row.size * self._row.size
+        if whole != size:
+            with open(self.path, "r+b") as file:
+                file.truncate(whole)
+
+    def _rewrite(self, records):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        tmp_clicks_path = f"{self.clicks_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(self._header())
+        open(tmp_clicks_path, "wb").close()
+        self._append_rows(tmp_path, tmp_clicks_path, [records[i] for i in range(len(records))])
+        os.replace(tmp_clicks_path, self.clicks_path)
+        os.replace(tmp_path, self.path)
+
+    def _append_rows(self, path, clicks_path, records):
+        # Prima i clic, poi le righe che li indicizzano: se un crash avviene in mezzo
+        # restano solo dei clic senza riga, che non danno fastidio
+        with open(clicks_path, "ab") as clicks_file:
+            click_offset = clicks_file.tell() // 4
+            click_data = bytearray()
+            for record in records:
+                click_data += struct.pack(f"<{len(record.click_times)}f", *record.click_times)
+            clicks_file.write(click_data)
+            clicks_file.flush()
+            os.fsync(clicks_file.fileno())
+
+        rows = bytearray()
+        for record in records:
+            values = [getattr(record, name) for name in RECORD_FIELDS]
+            rows += self._row.pack(*values, click_offset, len(record.click_times))
+            click_offset += len(record.click_times)
+
+        with open(path, "ab") as file:
+            file.write(rows)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _read_header(self, start, file):
+        # Colonne dichiarate nel file e lunghezza dell'intestazione, o (None, 0)
+        if len(start) < 6 or start[:4] != MAGIC:
+            return None, 0
+        header_size = struct.unpack_from("<H", start, 4)[0]
+        header = json.loads(file.read(header_size))
+        return [tuple(column) for column in header["columns"]], 6 + header_size
+
+    def _read(self):
+        # Restituisce lo storico e le colonne dichiarate nel file (None se il file non c'è)
+        records = RecordColumns()
+        try:
+            with open(self.path, "rb") as file:
+                file_columns, _ = self._read_header(file.read(6), file)
+                data = file.read()
+        except FileNotFoundError:
+            return records, None
+        if file_columns is None:
+            return records, None
+
+        row = struct.Struct("<" + "".join(code for _, code in file_columns))
+        body = memoryview(data)
+        count = len(body) // row.size
+        body = body[:count * row.size]
+
+        values = list(zip(*row.iter_unpack(body))) if count else [()] * len(file_columns)
+        by_name = dict(zip((name for name, _ in file_columns), values))
+        for name, _ in COLUMNS:
+            records.columns[name].extend(by_name.get(name, [DEFAULTS.get(name, 0)] * count))
+
+        try:
+            with open(self.clicks_path, "rb") as file:
+                clicks = file.read()
+            records.clicks.frombytes(clicks[:len(clicks) // 4 * 4])
+        except FileNotFoundError:
+            pass
+        return records, file_columns
+
+    def _read_legacy(self):
+        # Lo storico dei vecchi formati JSON, senza scrivere niente
+        columns = RecordColumns()
+        jsonl_path = os.path.splitext(self.path)[0] + ".jsonl"
+        entries = []
+        if os.path.exists(jsonl_path):
+            with open(jsonl_path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        elif os.path.exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r", encoding="utf-8") as file:
+                    entries = json.load(file)["progressi"]
+            except (ValueError, KeyError):
+                return columns
+
+        # Lo storico nuovo è in ordine cronologico: il vecchio viene ordinato una volta sola
+        for record in sorted((RoundRecord.from_entry(entry) for entry in entries), key=lambda r: r.timestamp):
+            columns.append(record)
+        return columns
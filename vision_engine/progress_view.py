@@ -0,0 +1,85 @@
+import tkinter as tk
+import tkinter.font as tkfont
+
+
+class ProgressView:
+    # Elenco dei progressi virtualizzato: sul canvas esistono solo le righe visibili
+    # (più una), che vengono riscritte a ogni scorrimento. Aprire la finestra costa
+    # quindi lo stesso con dieci o con diecimila sessioni. `entries` è una sequenza
+    # in ordine cronologico: la riga i mostra l'elemento len(entries) - 1 - i, cioè
+    # il più recente per primo, senza bisogno di ordinare.
+    def __init__(self, parent, entries, font=("Helvetica", 16), pady=5):
+        self.entries = entries
+        self.font = tkfont.Font(root=parent, font=font)
+        self.pady = pady
+        self.row_height = self.font.metrics("linespace") + 2 * pady
+        self.top = 0
+        self.rows = []
+
+        self.canvas = tk.Canvas(parent, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.canvas.bind("<Configure>", lambda e: self.redraw())
+        self.canvas.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.canvas.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def visible_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.entries))
+        elif args[0] == "scroll":
+            step = self.visible_rows() if args[2] == "pages" else 1
+            self.top += int(args[1]) * step
+        self.redraw()
+
+    def scroll(self, rows):
+        self.top += rows
+        self.redraw()
+
+    def redraw(self):
+        total = len(self.entries)
+        visible = self.visible_rows()
+        self.top = max(0, min(self.top, total - visible))
+
+        # Il pool di righe cresce solo se la finestra diventa più alta
+        while len(self.rows) < visible + 1:
+            self.rows.append(self.canvas.create_text(0, 0, anchor="n", font=self.font))
+
+        x = self.canvas.winfo_width() // 2
+        for slot, item in enumerate(self.rows):
+            index = self.top + slot
+            if index < total:
+                progress = self.entries[total - 1 - index]
+                text = f"Giorno: {progress.time_stamp}, Score: {progress.score}"
+            elif total == 0 and slot == 0:
+                text = "Nessun progresso disponibile."
+            else:
+                text = ""
+            self.canvas.coords(item, x, slot * self.row_height + self.pady)
+            self.canvas.itemconfigure(item, text=text)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+
+def draw_line_chart(canvas, values, width, height, pad=10, fill="blue"):
+    # Disegna una serie di valori tra 0 e 1 con una sola linea del canvas. Le coordinate
+    # sono calcolate con NumPy e, se i punti sono più dei pixel, la serie viene
+    # campionata a un punto per pixel.
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return None
+    if len(values) > width:
+        values = values[np.linspace(0, len(values) - 1, width).astype(np.int64)]
+    xs = np.linspace(pad, width - pad, len(values))
+    ys = height - pad - np.clip(values, 0.0, 1.0) * (height - 2 * pad)
+    return canvas.create_line(*np.column_stack((xs, ys)).ravel().tolist(), fill=fill, width=2)
@@ -0,0 +1,99 @@
+import math
+import time
+from array import array
+from datetime import datetime
+
+TIMESTAMP_FORMAT = "%d/%m/%y %H:%M"
+
+# Colonne di un round: nome -> codice struct/array. L'ordine è quello dei file binari.
+COLUMNS = (
+    ("timestamp", "d"),      # secondi dall'epoch
+    ("display_time", "f"),   # tempo di esposizione richiesto, in secondi (NaN se sconosciuto)
+    ("n_initial", "H"),
+    ("n_final", "H"),        # 0 se sconosciuto
+    ("hits", "H"),
+    ("false_alarms", "h"),   # -1 se sconosciuto
+    ("submit_time", "f"),    # secondi tra la comparsa della griglia e l'invio (NaN se sconosciuto)
+    ("exposure_time", "f"),  # tempo di esposizione misurato, dal primo frame alla rimozione (NaN se sconosciuto)
+    ("render_latency", "f"), # secondi tra l'inizio del round e il primo frame degli stimoli (NaN se sconosciuto)
+    ("plan_round", "i"),     # round del piano di sessione giocato, -1 se estratto al momento
+    ("plan_id", "I"),        # identità del piano (SessionPlan.plan_id), 0 se senza piano
+    ("click_offset", "Q"),   # posizione del primo clic nell'array dei clic
+    ("click_count", "H"),
+)
+# Colonne che corrispondono a un attributo di RoundRecord (le ultime due indicizzano i clic)
+RECORD_FIELDS = tuple(name for name, _ in COLUMNS[:-2])
+DEFAULTS = {"display_time": math.nan, "n_final": 0, "false_alarms": -1, "submit_time": math.nan,
+            "exposure_time": math.nan, "render_latency": math.nan, "plan_round": -1}
+
+
+class RoundRecord:
+    # Risultato di un round. I tempi dei clic sono in secondi dalla comparsa della griglia.
+    __slots__ = ("timestamp", "display_time", "n_initial", "n_final", "hits", "false_alarms",
+                 "submit_time", "click_times", "exposure_time", "render_latency", "plan_round", "plan_id")
+
+    def __init__(self, timestamp, display_time, n_initial, n_final, hits, false_alarms,
+                 submit_time=math.nan, click_times=(), exposure_time=math.nan, render_latency=math.nan,
+                 plan_round=-1, plan_id=0):
+        self.timestamp = timestamp
+        self.display_time = display_time
+        self.n_initial = n_initial
+        self.n_final = n_final
+        self.hits = hits
+        self.false_alarms = false_alarms
+        self.submit_time = submit_time
+        self.click_times = tuple(click_times)
+        self.exposure_time = exposure_time
+        self.render_latency = render_latency
+        self.plan_round = plan_round
+        self.plan_id = plan_id
+
+    @property
+    def score(self):
+        return f"{self.hits}/{self.n_initial}"
+
+    @property
+    def time_stamp(self):
+        return datetime.fromtimestamp(self.timestamp).strftime(TIMESTAMP_FORMAT)
+
+    @classmethod
+    def now(cls, **fields):
+        return cls(time.time(), **fields)
+
+    @classmethod
+    def from_entry(cls, entry):
+        # Converte i risultati dei vecchi progress.json / progress.jsonl
+        hits, _, n_initial = entry["score"].partition("/")
+        return cls(
+            timestamp=datetime.strptime(entry["time-stamp"], TIMESTAMP_FORMAT).timestamp(),
+            display_time=entry.get("time", math.nan),
+            n_initial=entry.get("initial", int(n_initial)),
+            n_final=entry.get("final", 0),
+            hits=entry.get("hits", int(hits)),
+            false_alarms=entry.get("false-positives", -1),
+        )
+
+
+class RecordColumns:
+    # Storico in colonne (array.array), una per campo di RoundRecord, più un unico array
+    # con i tempi di tutti i clic. Aggiungere un round costa O(1) e le colonne possono
+    # essere lette da NumPy senza copie (np.frombuffer).
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.clicks = array("f")
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def append(self, record):
+        for name in RECORD_FIELDS:
+            self.columns[name].append(getattr(record, name))
+        self.columns["click_offset"].append(len(self.clicks))
+        self.columns["click_count"].append(len(record.click_times))
+        self.clicks.extend(record.click_times)
+
+    def __getitem__(self, index):
+        values = {name: self.columns[name][index] for name in RECORD_FIELDS}
+        offset = self.columns["click_offset"][index]
+        values["click_times"] = self.clicks[offset:offset + self.columns["click_count"][index]]
+        return RoundRecord(**values)
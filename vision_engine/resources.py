@@ -0,0 +1,127 @@
+import os
+import random
+import threading
+import time
+
+from vision_engine.scoring import sample_excluding
+
+# Estensioni riconosciute come immagini; gli altri file della cartella vengono ignorati
+IMAGE_EXTENSIONS = frozenset({".png", ".gif", ".jpg", ".jpeg", ".bmp", ".webp", ".ppm", ".tif", ".tiff"})
+
+
+def package_dir(module_file):
+    # Cartella di un plugin: i file distribuiti con l'esercizio (immagini, dizionario)
+    # si cercano qui e non nella cartella da cui è stato lanciato il programma
+    return os.path.dirname(os.path.abspath(module_file))
+
+
+def data_dir(name, default):
+    # Cartella in cui un esercizio scrive i suoi dati (progressi, miniature, scheduler).
+    # Con VISION_DATA_DIR i dati di tutti gli esercizi finiscono in sottocartelle di
+    # quella indicata, utile quando la cartella del programma non è scrivibile
+    root = os.environ.get("VISION_DATA_DIR")
+    if root:
+        return os.path.join(os.path.abspath(os.path.expanduser(root)), name)
+    return default
+
+
+def database_path():
+    # Database dei progressi condiviso da tutti gli esercizi e profili: nella cartella
+    # del programma, o in VISION_DATA_DIR se impostata
+    root = os.environ.get("VISION_DATA_DIR")
+    if root:
+        return os.path.join(os.path.abspath(os.path.expanduser(root)), "sessions.db")
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sessions.db")
+
+
+def packs_dir():
+    # Cartella dei pacchetti di stimoli (packs.py): VISION_PACKS_DIR o `packs` nella
+    # cartella del programma
+    root = os.environ.get("VISION_PACKS_DIR")
+    if root:
+        return os.path.abspath(os.path.expanduser(root))
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "packs")
+
+
+class AssetManifest:
+    # Elenco dei file di una cartella, letto una volta e poi servito dalla memoria.
+    # Ad ogni accesso, al massimo ogni `check_interval` secondi, si controlla solo
+    # l'mtime della cartella (un stat): aggiungere, togliere o rinominare un file lo
+    # cambia e solo allora la cartella viene riletta. I file nascosti e quelli con
+    # estensione non in `extensions` (se indicata) vengono scartati.
+    def __init__(self, directory, extensions=None, check_interval=2.0):
+        self.directory = directory
+        self.extensions = None if extensions is None else frozenset(ext.lower() for ext in extensions)
+        self.check_interval = check_interval
+        self.version = 0  # aumenta a ogni rilettura, per chi tiene dati derivati dall'elenco
+        self._files = None
+        self._names = frozenset()
+        self._stamp = None
+        self._checked_at = 0.0
+        # Il manifest è usato sia dal thread di Tk sia da quello di prefetch
+        self._lock = threading.Lock()
+
+    @property
+    def files(self):
+        self.refresh()
+        return self._files
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, name):
+        self.refresh()
+        return name in self._names
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    # Sorgente da passare a ThumbnailCache e impronta che cambia con il file: qui sono
+    # il percorso e mtime/dimensione, in un pacchetto (packs.PackManifest) il membro
+    # dell'archivio e il suo CRC
+    def source(self, name):
+        return self.path(name)
+
+    def stamp(self, name):
+        stat = os.stat(self.path(name))
+        return f"{stat.st_mtime_ns:x}{stat.st_size:x}"
+
+    def refresh(self, force=False):
+        # Restituisce True se l'elenco è stato riletto
+        if not force and self._files is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            try:
+                stat = os.stat(self.directory)
+                stamp = (stat.st_ino, stat.st_mtime_ns)
+            except FileNotFoundError:
+                stamp = None
+            self._checked_at = time.monotonic()
+            if not force and self._files is not None and stamp == self._stamp:
+                return False
+            self._files = self._scan() if stamp is not None else ()
+            self._names = frozenset(self._files)
+            self._stamp = stamp
+            self.version += 1
+            return True
+
+    def _scan(self):
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if self.extensions is not None and os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                    continue
+                if entry.is_file():
+                    files.append(entry.name)
+        # Ordinato, così con lo stesso seme si estraggono gli stessi file su ogni sistema
+        files.sort()
+        return tuple(files)
+
+    def sample(self, count, exclude=(), rng=random):
+        files = self.files
+        exclude = set(exclude)
+        if count + len(exclude & self._names) > len(files):
+            raise ValueError(f"La cartella {self.directory} contiene solo {len(files)} file.")
+        return sample_excluding(files, count, exclude, rng)
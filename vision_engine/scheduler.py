@@ -0,0 +1,91 @@
+import json
+import os
+
+
+class StaircaseScheduler:
+    # Propone tempo di esposizione e numero di stimoli del prossimo round in base ai
+    # risultati, con una scala a gradini: due round buoni di fila rendono l'esercizio
+    # più difficile (alternando uno stimolo in più e un tempo più breve), un round
+    # cattivo lo rende più facile. Ogni round aggiorna lo stato in O(1); lo stato è
+    # salvato in un piccolo file JSON e, la prima volta, ricavato dall'ultimo round
+    # dello storico invece di rileggerlo tutto.
+    GOOD = 0.8
+    BAD = 0.5
+
+    def __init__(self, path, max_items, min_time=0.5, max_time=20.0):
+        self.path = path
+        self.max_items = max_items
+        self.min_time = min_time
+        self.max_time = max_time
+        self.display_time = 3.0
+        self.n_initial = 3
+        self.good_streak = 0
+        self.harder_by_time = False
+
+    def load(self, store=None):
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            self.display_time = state["display_time"]
+            self.n_initial = state["n_initial"]
+            self.good_streak = state["good_streak"]
+            self.harder_by_time = state["harder_by_time"]
+        except (FileNotFoundError, ValueError, KeyError):
+            if store is not None and len(store):
+                last = store[-1]
+                if last.display_time == last.display_time:  # non NaN
+                    self.display_time = float(last.display_time)
+                self.n_initial = last.n_initial
+        self._clamp()
+        return self
+
+    def state(self):
+        return {
+            "display_time": self.display_time,
+            "n_initial": self.n_initial,
+            "good_streak": self.good_streak,
+            "harder_by_time": self.harder_by_time,
+        }
+
+    def save(self, state=None):
+        # Può essere chiamato da un thread di lavoro con uno stato già copiato
+        state = self.state() if state is None else state
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(tmp_path, self.path)
+
+    def propose(self, capacity=None):
+        # (tempo, stimoli iniziali, stimoli finali) per il prossimo round. Gli stimoli
+        # iniziali sono al massimo quanti ne entrano nello schermo (`capacity`) e sempre
+        # meno di quelli finali, così c'è almeno un distrattore
+        n_initial = self.n_initial if capacity is None else min(self.n_initial, max(1, capacity))
+        return round(self.display_time, 2), n_initial, min(self.max_items, 2 * n_initial)
+
+    def update(self, record):
+        # I falsi positivi contano come errori, altrimenti basterebbe selezionare tutto
+        false_alarms = max(0, record.false_alarms)
+        performance = (record.hits - false_alarms) / max(1, record.n_initial)
+
+        if performance >= self.GOOD:
+            self.good_streak += 1
+            if self.good_streak >= 2:
+                self.good_streak = 0
+                if self.harder_by_time or self.n_initial >= self.max_items - 1:
+                    self.display_time *= 0.85
+                else:
+                    self.n_initial += 1
+                self.harder_by_time = not self.harder_by_time
+        elif performance < self.BAD:
+            self.good_streak = 0
+            if self.n_initial > 1:
+                self.n_initial -= 1
+            self.display_time *= 1.2
+        else:
+            self.good_streak = 0
+        self._clamp()
+
+    def _clamp(self):
+        self.display_time = min(self.max_time, max(self.min_time, self.display_time))
+        # Almeno uno stimolo, e almeno un distrattore se ce ne sono due
+        self.n_initial = max(1, min(self.max_items - 1, self.n_initial))
@@ -0,0 +1,32 @@
+import random
+
+
+def sample_excluding(population, count, exclude=frozenset(), rng=random):
+    # `count` elementi distinti di `population` (una sequenza senza doppioni) che non
+    # sono in `exclude` (un set). Con poche esclusioni conviene estrarre indici a caso e
+    # scartare i doppioni: il costo è O(count) e non dipende dalla dimensione di
+    # `population`; altrimenti si filtra l'elenco una volta
+    if 2 * (count + len(exclude)) <= len(population):
+        chosen = {}
+        while len(chosen) < count:
+            item = population[rng.randrange(len(population))]
+            if item not in exclude:
+                chosen[item] = None
+        return list(chosen)
+    return rng.sample([item for item in population if item not in exclude], count)
+
+
+def draw_final(provider, items_initial, num_final, rng=random):
+    # Stimoli della griglia finale: quelli iniziali più i distrattori, mescolati per
+    # evitare che quelli iniziali siano sempre nelle stesse posizioni
+    distractors = provider.draw_distractors(num_final - len(items_initial), items_initial, rng=rng)
+    items_final = list(items_initial) + distractors
+    rng.shuffle(items_final)
+    return items_final
+
+
+def score_round(items_initial, selected_items):
+    # Restituisce gli stimoli selezionati che erano davvero tra quelli iniziali,
+    # nell'ordine in cui compaiono nella selezione
+    correct = set(selected_items) & set(items_initial)
+    return [item for item in selected_items if item in correct]
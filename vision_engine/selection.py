@@ -0,0 +1,44 @@
+class SelectionModel:
+    # Selezione della griglia finale tenuta in Python come insieme di indici. La vista
+    # segue il modello: ogni modifica notifica ai listener solo gli indici cambiati,
+    # e nessuno legge mai lo stato dai colori dei widget.
+    def __init__(self, items=()):
+        self._listeners = []
+        self.reset(items)
+
+    def reset(self, items):
+        self.items = list(items)
+        self.selected = set()
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, changed):
+        if changed:
+            for listener in self._listeners:
+                listener(changed)
+
+    def is_selected(self, index):
+        return index in self.selected
+
+    def toggle(self, index):
+        if index in self.selected:
+            self.selected.discard(index)
+        else:
+            self.selected.add(index)
+        self._notify([index])
+
+    def set_many(self, indices, selected=True):
+        if selected:
+            changed = [index for index in indices if index not in self.selected]
+            self.selected.update(changed)
+        else:
+            changed = [index for index in indices if index in self.selected]
+            self.selected.difference_update(changed)
+        self._notify(changed)
+
+    def clear(self):
+        self.set_many(list(self.selected), selected=False)
+
+    def selected_items(self):
+        return [self.items[index] for index in sorted(self.selected)]
@@ -0,0 +1,556 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import signal
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from vision_engine.database import DEFAULT_USER, SessionDatabase
+from vision_engine.display import VirtualDisplay
+from vision_engine.records import RoundRecord
+from vision_engine.resources import database_path
+from vision_engine.scoring import draw_final, score_round
+from vision_engine.websocket import WebSocket, WebSocketError, accept_key
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+# Dimensioni (in pixel CSS) entro cui viene riportata la finestra del browser
+MIN_DISPLAY = (320, 240)
+MAX_DISPLAY = (7680, 4320)
+MAX_HEADER = 16 * 1024
+MAX_BODY = 64 * 1024
+
+
+class RoundError(ValueError):
+    # Richiesta non valida: il messaggio (in italiano) viene mostrato al client
+    pass
+
+
+class PendingRound:
+    __slots__ = ("user", "exercise", "time", "items_initial", "items_final", "created")
+
+    def __init__(self, user, exercise, display_time, items_initial, items_final):
+        self.user = user
+        self.exercise = exercise
+        self.time = display_time
+        self.items_initial = items_initial
+        self.items_final = items_final
+        self.created = time.monotonic()
+
+
+def _seconds(value):
+    # JSON non ha NaN: i tempi non misurati arrivano come null
+    return float("nan") if value is None else float(value)
+
+
+class RoundService:
+    # La logica di un round senza interfaccia, come in MemoryApp: stessa estrazione,
+    # stesso piazzamento (su un VirtualDisplay grande quanto la finestra del browser) e
+    # stesso punteggio. I round in attesa di risposta restano in memoria al massimo
+    # `round_ttl` secondi; i risultati vanno nel database comune a blocchi, in un
+    # thread a parte, così il ciclo di asyncio non aspetta mai il disco. `packs` sono i
+    # pacchetti di stimoli (packs.py) da usare al posto di quelli distribuiti, uno per
+    # esercizio.
+    def __init__(self, database, exercises=None, round_ttl=600.0, batch_size=256, rng=None, packs=()):
+        from vision_engine.launcher import EXERCISES
+
+        self.database = database
+        self.exercises = list(exercises or EXERCISES)
+        self.packs = {pack.exercise: pack for pack in packs}
+        self.round_ttl = round_ttl
+        self.batch_size = batch_size
+        self.retry_interval = 1.0  # secondi tra un tentativo di scrittura fallito e il successivo
+        self.rng = rng or random.Random()
+        self.providers = {}
+        self.pending = OrderedDict()
+        self._records = None
+        self._writer = None
+        self._executor = None
+
+    def provider(self, exercise):
+        if exercise not in self.exercises:
+            raise RoundError(f"Esercizio sconosciuto: {exercise}")
+        provider = self.providers.get(exercise)
+        if provider is None:
+            from vision_engine.launcher import load_provider
+
+            provider = self.providers[exercise] = load_provider(exercise, self.packs.get(exercise))
+            provider.warm_up()
+        return provider
+
+    def new_round(self, user, exercise, display_time, num_initial, num_final, width=1920, height=1080, pixel_ratio=1.0):
+        provider = self.provider(exercise)
+        max_items = provider.max_items()
+        noun = provider.noun
+        # NaN e infinito passerebbero il confronto e finirebbero nel JSON e nel database
+        if not math.isfinite(display_time) or display_time <= 0:
+            raise RoundError("Il tempo deve essere un numero positivo.")
+        if not math.isfinite(pixel_ratio) or pixel_ratio <= 0:
+            raise RoundError("La densità di pixel deve essere un numero positivo.")
+        if not 1 <= num_initial <= max_items:
+            raise RoundError(f"Il numero di {noun} iniziali deve essere compreso tra 1 e {max_items}.")
+        if not num_initial <= num_final <= max_items:
+            raise RoundError(f"Il numero di {noun} finali deve essere compreso tra {num_initial} e {max_items}.")
+
+        # La finestra del browser è limitata a dimensioni ragionevoli: un piazzamento su
+        # uno schermo enorme costerebbe memoria e tempo senza senso
+        display = VirtualDisplay(min(max(int(width), MIN_DISPLAY[0]), MAX_DISPLAY[0]),
+                                 min(max(int(height), MIN_DISPLAY[1]), MAX_DISPLAY[1]))
+        items_initial = provider.draw_initial(num_initial, rng=self.rng)
+        placer = provider.placer(display, items_initial)
+        if num_initial > placer.capacity:
+            raise RoundError(f"Lo schermo può contenere al massimo {placer.capacity} {noun} iniziali.")
+        positions = placer.place(num_initial, rng=self.rng)
+        items_final = draw_final(provider, items_initial, num_final, rng=self.rng)
+
+        self._expire()
+        round_id = uuid.uuid4().hex
+        self.pending[round_id] = PendingRound(user, exercise, display_time, items_initial, items_final)
+        reply = {
+            "type": "round",
+            "id": round_id,
+            "exercise": exercise,
+            "kind": provider.kind,
+            "time": display_time,
+            "initial": [{"item": item, "x": x, "y": y} for item, (x, y) in zip(items_initial, positions)],
+            "final": items_final,
+            "item_size": [placer.item_width, placer.item_height],
+        }
+        if provider.kind == "image":
+            # Il livello della piramide tiene conto della densità di pixel del browser
+            level = provider.thumbnails.level_for(display.scale.pixels(100) * pixel_ratio)
+            urls = {item: self.thumbnail_url(exercise, level, item) for item in set(items_final)}
+            reply["urls"] = urls
+        else:
+            # In pixel CSS (1 punto = 4/3 pixel)
+            family, points = provider.scaled_font(provider.stimulus_font, display.scale)
+            reply["font"] = [family, round(points * 4 / 3)]
+        return reply
+
+    def thumbnail_url(self, exercise, level, name):
+        return f"/thumbnails/{exercise}/{level}/{quote(name)}?v={self.thumbnail_version(exercise, name)}"
+
+    def thumbnail_version(self, exercise, name):
+        # Cambia se il file sorgente cambia: l'URL con la versione può restare in cache per sempre
+        return self.provider(exercise).manifest.stamp(name)
+
+    def _expire(self):
+        # I round sono in ordine di creazione: si tolgono dall'inizio quelli scaduti
+        deadline = time.monotonic() - self.round_ttl
+        while self.pending:
+            round_id, pending_round = next(iter(self.pending.items()))
+            if pending_round.created > deadline:
+                break
+            del self.pending[round_id]
+
+    def answer(self, user, round_id, selected, submit_time=float("nan"), click_times=(),
+               exposure_time=float("nan"), render_latency=float("nan")):
+        pending_round = self.pending.get(round_id)
+        if pending_round is None or pending_round.user != user:
+            raise RoundError("Round sconosciuto o scaduto.")
+        del self.pending[round_id]
+        final = set(pending_round.items_final)
+        selected = list(dict.fromkeys(item for item in selected if item in final))
+        correct = score_round(pending_round.items_initial, selected)
+        record = RoundRecord.now(
+            display_time=pending_round.time,
+            n_initial=len(pending_round.items_initial),
+            n_final=len(pending_round.items_final),
+            hits=len(correct),
+            false_alarms=len(selected) - len(correct),
+            submit_time=_seconds(submit_time),
+            click_times=[_seconds(value) for value in click_times],
+            exposure_time=_seconds(exposure_time),
+            render_latency=_seconds(render_latency),
+        )
+        self.save(user, pending_round.exercise, record)
+        return {
+            "type": "result",
+            "id": round_id,
+            "selected": selected,
+            "correct": correct,
+            "initial": pending_round.items_initial,
+            "score": len(correct),
+        }
+
+    def summary(self, user):
+        return {"type": "summary", "user": user, "exercises": self.database.summary(user)}
+
+    def save(self, user, exercise, record):
+        if self._records is None:
+            self._records = asyncio.Queue()
+            self._writer = asyncio.get_running_loop().create_task(self._write_records())
+        self._records.put_nowait((user, exercise, record))
+
+    async def _write_records(self):
+        # Un solo thread per il database: una connessione e una transazione per blocco
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="server-db")
+        loop = asyncio.get_running_loop()
+        failed = []
+        while True:
+            # Un blocco fallito viene riprovato dopo una pausa, senza aspettare nuovi
+            # risultati: flush() (e quindi la chiusura con SIGTERM) non resta appeso
+            batch = failed or [await self._records.get()]
+            while len(batch) < self.batch_size and not self._records.empty():
+                batch.append(self._records.get_nowait())
+            groups = {}
+            for user, exercise, record in batch:
+                groups.setdefault((user, exercise), []).append(record)
+            try:
+                await loop.run_in_executor(self._executor, self._write_groups, groups)
+            except Exception as error:
+                print(f"Impossibile salvare {len(batch)} round: {error}", file=sys.stderr)
+                failed = batch
+                await asyncio.sleep(self.retry_interval)
+                continue
+            failed = []
+            for _ in batch:
+                self._records.task_done()
+
+    def _write_groups(self, groups):
+        for (user, exercise), records in groups.items():
+            self.database.add_rounds(user, exercise, records)
+
+    async def flush(self):
+        if self._records is not None:
+            await self._records.join()
+
+    async def close(self, timeout=30.0):
+        # Se il database resta inaccessibile non si aspetta per sempre: i round non
+        # salvati vengono segnalati e il server si chiude
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            print("Chiusura: i round rimasti in coda non sono stati salvati", file=sys.stderr)
+        if self._writer is not None:
+            self._writer.cancel()
+        if self._executor is not None:
+            self._executor.submit(self.database.close).result()
+            self._executor.shutdown()
+
+
+class Request:
+    __slots__ = ("method", "path", "query", "version", "headers", "body")
+
+    def __init__(self, method, target, version, headers, body=b""):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+async def read_request(reader):
+    # None se il client ha chiuso la connessione tra una richiesta e l'altra
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as error:
+        if error.partial:
+            raise HttpError(400, "Richiesta incompleta")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Intestazioni troppo lunghe")
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    try:
+        method, target, version = request_line.split(" ")
+    except ValueError:
+        raise HttpError(400, "Riga di richiesta non valida")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length non valido")
+    if length < 0:
+        raise HttpError(400, "Content-Length non valido")
+    if length > MAX_BODY:
+        raise HttpError(413, "Richiesta troppo grande")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, version, headers, body)
+
+
+def encode_response(status, headers, body, keep_alive):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+    headers = dict(headers)
+    headers["Content-Length"] = str(len(body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+def json_response(data, status=200):
+    return status, {"Content-Type": "application/json; charset=utf-8", "Cache-Control": "no-store"}, \
+        json.dumps(data).encode("utf-8")
+
+
+class ExerciseServer:
+    # Server HTTP e WebSocket per giocare dal browser, su asyncio e senza dipendenze.
+    #   GET  /                      pagina del client (static/index.html)
+    #   GET  /ws                    WebSocket: messaggi JSON hello, round, answer, summary
+    #   POST /api/round, /api/answer, GET /api/summary?user=...   gli stessi messaggi via HTTP
+    #   GET  /thumbnails/<esercizio>/<livello>/<immagine>?v=...    miniature PNG
+    # Le miniature sono generate (e codificate in PNG) in un thread, tenute in una LRU in
+    # memoria e servite con ETag; con la versione giusta nell'URL sono immutabili.
+    def __init__(self, service, host="127.0.0.1", port=8765, thumbnail_cache=512):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.thumbnail_cache = thumbnail_cache
+        self._thumbnails = OrderedDict()
+        self._index_page = None
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port, limit=MAX_HEADER)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.service.close()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as error:
+                    writer.write(encode_response(error.status, {"Content-Type": "text/plain; charset=utf-8"},
+                                                 str(error).encode("utf-8"), False))
+                    break
+                if request is None:
+                    break
+                if request.path == "/ws" and request.headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(request, reader, writer)
+                    break
+                status, headers, body = await self.route(request)
+                writer.write(encode_response(status, headers, body if request.method != "HEAD" else b"",
+                                             request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, request):
+        try:
+            if request.path == "/" and request.method in ("GET", "HEAD"):
+                return 200, {"Content-Type": "text/html; charset=utf-8", "Cache-Control": "no-cache"}, self.index_page()
+            if request.path.startswith("/thumbnails/") and request.method in ("GET", "HEAD"):
+                return await self.thumbnail(request)
+            if request.path == "/api/exercises":
+                return json_response({"exercises": self.service.exercises})
+            if request.path == "/api/summary":
+                return json_response(self.service.summary(request.query.get("user") or DEFAULT_USER))
+            if request.path in ("/api/round", "/api/answer"):
+                if request.method != "POST":
+                    raise HttpError(405, "Usare POST")
+                try:
+                    message = json.loads(request.body or b"{}")
+                except ValueError:
+                    raise HttpError(400, "JSON non valido")
+                if not isinstance(message, dict):
+                    raise HttpError(400, "Il messaggio deve essere un oggetto JSON")
+                message["type"] = request.path.rsplit("/", 1)[1]
+                return json_response(self.dispatch({"user": message.get("user") or DEFAULT_USER}, message))
+            raise HttpError(404, "Non trovato")
+        except RoundError as error:
+            return json_response({"type": "error", "message": str(error)}, 400)
+        except HttpError as error:
+            return error.status, {"Content-Type": "text/plain; charset=utf-8"}, str(error).encode("utf-8")
+
+    def index_page(self):
+        if self._index_page is None:
+            with open(os.path.join(STATIC_DIR, "index.html"), "rb") as file:
+                self._index_page = file.read()
+        return self._index_page
+
+    def dispatch(self, session, message):
+        # Un messaggio del client (dict) -> la risposta (dict); `session` è lo stato
+        # della connessione WebSocket (o della singola richiesta HTTP)
+        kind = message.get("type")
+        try:
+            if kind == "hello":
+                session["user"] = str(message.get("user") or DEFAULT_USER)
+                return {"type": "hello", "user": session["user"], "exercises": self.service.exercises}
+            if kind == "round":
+                return self.service.new_round(
+                    session["user"], message.get("exercise"),
+                    float(message.get("time", 2.0)), int(message.get("initial", 5)), int(message.get("final", 10)),
+                    width=message.get("width", 1920), height=message.get("height", 1080),
+                    pixel_ratio=float(message.get("pixel_ratio", 1.0)))
+            if kind == "answer":
+                return self.service.answer(
+                    session["user"], message.get("id"), list(message.get("selected", ())),
+                    submit_time=message.get("submit_time", float("nan")),
+                    click_times=message.get("click_times", ()),
+                    exposure_time=message.get("exposure_time", float("nan")),
+                    render_latency=message.get("render_latency", float("nan")))
+            if kind == "summary":
+                return self.service.summary(session["user"])
+        except (TypeError, ValueError, OverflowError) as error:
+            # OverflowError: int() di numeri JSON come 1e999
+            if isinstance(error, RoundError):
+                raise
+            raise RoundError(f"Messaggio non valido: {error}")
+        raise RoundError(f"Tipo di messaggio sconosciuto: {kind}")
+
+    async def handle_websocket(self, request, reader, writer):
+        key = request.headers.get("sec-websocket-key")
+        if not key:
+            writer.write(encode_response(400, {}, b"Sec-WebSocket-Key mancante", False))
+            return
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode("ascii"))
+        await writer.drain()
+        socket = WebSocket(reader, writer)
+        session = {"user": DEFAULT_USER}
+        try:
+            while True:
+                message = await socket.receive()
+                if message is None:
+                    break
+                data = None
+                try:
+                    data = json.loads(message)
+                    if not isinstance(data, dict):
+                        raise RoundError("Il messaggio deve essere un oggetto JSON")
+                    reply = self.dispatch(session, data)
+                except ValueError as error:
+                    reply = {"type": "error", "message": str(error)}
+                if isinstance(data, dict) and "request" in data:
+                    # Il client può numerare le richieste per abbinare le risposte
+                    reply["request"] = data["request"]
+                await socket.send(json.dumps(reply))
+        except WebSocketError:
+            pass
+        await socket.close()
+
+    async def thumbnail(self, request):
+        try:
+            _, _, exercise, level, name = request.path.split("/", 4)
+            level = int(level)
+        except ValueError:
+            raise HttpError(404, "Non trovato")
+        try:
+            provider = self.service.provider(exercise)
+        except RoundError:
+            raise HttpError(404, "Non trovato")
+        # Solo i file elencati nel manifest: niente percorsi arbitrari
+        if provider.kind != "image" or name not in provider.manifest or level not in provider.thumbnails.levels:
+            raise HttpError(404, "Non trovato")
+        version = self.service.thumbnail_version(exercise, name)
+        etag = f'"{version}-{level}"'
+        headers = {"ETag": etag}
+        if request.query.get("v") == version:
+            headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            headers["Cache-Control"] = "no-cache"
+        if request.headers.get("if-none-match") == etag:
+            return 304, headers, b""
+
+        key = (exercise, name, level, version)
+        body = self._thumbnails.get(key)
+        if body is None:
+            source = provider.manifest.source(name)
+            body = await asyncio.get_running_loop().run_in_executor(
+                None, self._encode_thumbnail, provider, source, level)
+            self._thumbnails[key] = body
+            if len(self._thumbnails) > self.thumbnail_cache:
+                self._thumbnails.popitem(last=False)
+        else:
+            self._thumbnails.move_to_end(key)
+        headers["Content-Type"] = "image/png"
+        return 200, headers, body
+
+    @staticmethod
+    def _encode_thumbnail(provider, source, level):
+        import io
+
+        buffer = io.BytesIO()
+        provider.thumbnails.get(source, level).save(buffer, "PNG")
+        return buffer.getvalue()
+
+
+async def serve(host, port, database, exercises=None, packs=()):
+    service = RoundService(database, exercises, packs=packs)
+    server = await ExerciseServer(service, host, port).start()
+    # Il test di carico legge questa riga per sapere su che porta collegarsi
+    print(f"In ascolto su http://{host}:{server.port}", flush=True)
+    # Con SIGTERM (o Ctrl+C) i risultati ancora in coda vengono scritti prima di uscire
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for name in ("SIGTERM", "SIGINT"):
+        try:
+            loop.add_signal_handler(getattr(signal, name), stop.set)
+        except (AttributeError, NotImplementedError):
+            pass  # Windows: resta il KeyboardInterrupt
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    from vision_engine.launcher import EXERCISES
+
+    parser = argparse.ArgumentParser(description="Serve gli esercizi a più utenti via browser (HTTP e WebSocket).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="0 per una porta libera qualsiasi")
+    parser.add_argument("--database", default=None, help="database dei progressi (di default quello comune)")
+    parser.add_argument("--exercise", action="append", choices=list(EXERCISES),
+                        help="esercizi da servire (di default tutti)")
+    parser.add_argument("--pack", action="append", default=[],
+                        help="pacchetto di stimoli (file o nome nella cartella dei pacchetti) al posto di quello distribuito")
+    args = parser.parse_args(argv)
+
+    from vision_engine.packs import PackError, open_pack
+
+    try:
+        packs = [open_pack(pack) for pack in args.pack]
+    except (OSError, PackError) as error:
+        sys.exit(f"Pacchetto non valido: {error}")
+    database = SessionDatabase(args.database or database_path())
+    try:
+        asyncio.run(serve(args.host, args.port, database, args.exercise, packs))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
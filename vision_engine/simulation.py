@@ -0,0 +1,101 @@
+import argparse
+import random
+import time
+
+from vision_engine.display import VirtualDisplay
+from vision_engine.scoring import draw_final, score_round
+
+
+class SimulatedRound:
+    __slots__ = ("items_initial", "items_final", "positions", "selected", "correct")
+
+    def __init__(self, items_initial, items_final, positions, selected, correct):
+        self.items_initial = items_initial
+        self.items_final = items_final
+        self.positions = positions
+        self.selected = selected
+        self.correct = correct
+
+
+def simulate_round(provider, display, num_initial, num_final, rng=random,
+                   hit_rate=0.8, false_alarm_rate=0.1, load_assets=False):
+    # Un round completo senza Tk: stessa estrazione, stesso piazzamento e stesso
+    # punteggio dell'app. L'utente simulato seleziona ogni stimolo visto con
+    # probabilità hit_rate e ogni distrattore con probabilità false_alarm_rate.
+    items_initial = provider.draw_initial(num_initial, rng=rng)
+    positions = provider.placer(display, items_initial).place(num_initial, rng=rng)
+    items_final = draw_final(provider, items_initial, num_final, rng=rng)
+    if load_assets:
+        provider.load_assets(items_initial)
+        provider.load_assets(items_final)
+
+    initial = set(items_initial)
+    selected = [item for item in items_final
+                if rng.random() < (hit_rate if item in initial else false_alarm_rate)]
+    return SimulatedRound(items_initial, items_final, positions, selected, score_round(items_initial, selected))
+
+
+def simulate_plan_round(plan_round, rng=random, hit_rate=0.8, false_alarm_rate=0.1):
+    # Come simulate_round, ma con stimoli, griglia e posizioni già scritti in un piano
+    initial = set(plan_round.items_initial)
+    selected = [item for item in plan_round.items_final
+                if rng.random() < (hit_rate if item in initial else false_alarm_rate)]
+    return SimulatedRound(plan_round.items_initial, plan_round.items_final, plan_round.positions,
+                          selected, score_round(plan_round.items_initial, selected))
+
+
+def simulate(provider, rounds, num_initial, num_final, display=None, rng=None, **kwargs):
+    display = display or VirtualDisplay()
+    rng = rng or random.Random()
+    return [simulate_round(provider, display, num_initial, num_final, rng=rng, **kwargs) for _ in range(rounds)]
+
+
+def main(argv=None):
+    from vision_engine.launcher import EXERCISES, load_provider
+    from vision_engine.packs import PackError, open_pack
+
+    parser = argparse.ArgumentParser(description="Simula round degli esercizi senza interfaccia grafica.")
+    parser.add_argument("exercise", choices=list(EXERCISES))
+    parser.add_argument("--rounds", type=int, default=10000)
+    parser.add_argument("--initial", type=int, default=5)
+    parser.add_argument("--final", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--plan", help="rigioca i round di un piano di sessione invece di estrarli")
+    parser.add_argument("--pack", help="pacchetto di stimoli (file o nome) al posto di quelli distribuiti")
+    args = parser.parse_args(argv)
+    pack = None
+    if args.pack:
+        try:
+            pack = open_pack(args.pack)
+        except (OSError, PackError) as error:
+            parser.error(str(error))
+        if pack.exercise != args.exercise:
+            parser.error(f"il pacchetto è per l'esercizio {pack.exercise}")
+
+    start = time.perf_counter()
+    if args.plan:
+        from vision_engine.plans import SessionPlan
+
+        plan = SessionPlan(args.plan)
+        if plan.exercise != args.exercise:
+            parser.error(f"il piano è per l'esercizio {plan.exercise}")
+        rng = random.Random(args.seed)
+        results = [simulate_plan_round(plan[i % len(plan)], rng=rng) for i in range(args.rounds)]
+        args.initial = plan.num_initial
+        plan.close()
+    else:
+        provider = load_provider(args.exercise, pack)
+        display = VirtualDisplay(args.width, args.height)
+        results = simulate(provider, args.rounds, args.initial, args.final,
+                           display=display, rng=random.Random(args.seed))
+    elapsed = time.perf_counter() - start
+
+    mean_score = sum(len(r.correct) for r in results) / len(results)
+    print(f"{args.exercise}: {len(results)} round in {elapsed:.3f} s "
+          f"({len(results) / elapsed:.0f} round/s), score medio {mean_score:.2f}/{args.initial}")
+
+
+if __name__ == "__main__":
+    main()
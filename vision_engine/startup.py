@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+
+# Istante in cui il pacchetto viene importato: tutti i tempi del rapporto partono da qui
+STARTED_AT = time.perf_counter()
+
+# Tempo massimo accettabile tra l'import del pacchetto e il primo frame della
+# schermata iniziale; sui kiosk lenti si può alzare con VISION_COLD_START_BUDGET_MS
+COLD_START_BUDGET_MS = float(os.environ.get("VISION_COLD_START_BUDGET_MS", 500))
+
+_marks = []
+
+
+def mark(name):
+    _marks.append((name, time.perf_counter()))
+
+
+def elapsed_ms(name=None):
+    # Millisecondi dall'import del pacchetto fino al segno `name` (o fino ad ora)
+    for mark_name, at in _marks:
+        if mark_name == name:
+            return (at - STARTED_AT) * 1000
+    if name is not None:
+        raise KeyError(name)
+    return (time.perf_counter() - STARTED_AT) * 1000
+
+
+def interpreter_ms():
+    # Tempo passato tra l'avvio del processo e l'import del pacchetto (interprete e
+    # moduli importati prima). Solo su Linux, con la risoluzione del clock del kernel
+    try:
+        with open("/proc/self/stat") as f:
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    age = uptime - started_ticks / os.sysconf("SC_CLK_TCK")
+    return max(0.0, age * 1000 - elapsed_ms())
+
+
+def report(file=None):
+    file = sys.stderr if file is None else file
+    interpreter = interpreter_ms()
+    if interpreter is not None:
+        print(f"{'interprete (circa)':<24}{interpreter:9.1f} ms", file=file)
+    previous = STARTED_AT
+    for name, at in _marks:
+        print(f"{name:<24}{(at - STARTED_AT) * 1000:9.1f} ms  (+{(at - previous) * 1000:.1f})", file=file)
+        previous = at
+    print(f"{'budget':<24}{COLD_START_BUDGET_MS:9.1f} ms", file=file)
+
+
+def within_budget():
+    return elapsed_ms("primo frame") <= COLD_START_BUDGET_MS
+
+
+def report_requested():
+    return os.environ.get("VISION_STARTUP_REPORT", "") not in ("", "0")
+
+
+def after_first_frame(root, callback):
+    # Il primo frame è disegnato quando, con il mainloop avviato, Tk ha smaltito
+    # i lavori in attesa (geometria e ridisegno dei widget)
+    def on_idle():
+        root.update_idletasks()
+        if not any(name == "primo frame" for name, _ in _marks):
+            mark("primo frame")
+        callback()
+
+    root.after_idle(on_idle)
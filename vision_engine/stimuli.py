@@ -0,0 +1,89 @@
+import random
+
+from vision_engine.display import DisplayScale
+
+
+class StimulusProvider:
+    # Interfaccia di un esercizio: cosa sono gli stimoli, come si estraggono e come si
+    # disegnano. Tutto il resto (schermate, griglia, punteggio, salvataggio) è in
+    # MemoryApp. I metodi draw_*, load_assets e placer non devono toccare Tk: i primi
+    # possono essere chiamati dal thread di prefetch e tutti e tre dalla simulazione
+    # senza interfaccia (placer riceve un TkDisplay o un VirtualDisplay).
+    # I metodi create_* e update_* sono chiamati solo dal thread di Tk: i widget e gli
+    # elementi del canvas vengono creati una volta e poi riconfigurati a ogni round.
+    name = "esercizio"  # nome usato dal launcher e salvato nei progressi
+    title = "Memory Test"
+    noun = "elementi"  # usato nei messaggi, es. "Numero di lettere iniziali"
+    font_family = "Arial"
+    # "text" se gli stimoli sono scritti con `stimulus_font` (in punti, per uno schermo
+    # 1920x1080), "image" se sono miniature; serve ai client che non usano Tk (server.py)
+    kind = "text"
+    stimulus_font = ("Arial", 24)
+    button_font = ("Arial", 12)
+
+    # `resource_dir` contiene i file distribuiti con l'esercizio, `data_dir` quelli che
+    # scrive (progressi, cache); di solito coincidono, vedi resources.data_dir
+    def __init__(self, data_dir, resource_dir=None):
+        self.data_dir = data_dir
+        self.resource_dir = data_dir if resource_dir is None else resource_dir
+        # Scala dello schermo su cui si gioca, usata da create_* e update_*; placer
+        # usa invece quella del display che riceve
+        self.scale = DisplayScale()
+
+    def set_scale(self, scale):
+        # Chiamato da MemoryApp all'inizio di ogni round; True se la scala è cambiata
+        if scale == self.scale:
+            return False
+        self.scale = scale
+        return True
+
+    def scaled_font(self, font, scale=None):
+        family, points = font
+        return family, (scale or self.scale).font(points)
+
+    def max_items(self):
+        return 100
+
+    def vocabulary(self):
+        # Tutti gli stimoli possibili, per i piani di sessione generati offline (plans.py)
+        raise NotImplementedError
+
+    def warm_up(self):
+        # Lavoro da fare in background all'avvio, es. leggere il dizionario
+        pass
+
+    def draw_initial(self, count, rng=random):
+        raise NotImplementedError
+
+    def draw_distractors(self, count, initial, rng=random):
+        raise NotImplementedError
+
+    def load_assets(self, items):
+        # Dati già decodificati associati agli stimoli (es. miniature), uno per elemento
+        return [None] * len(items)
+
+    def placer(self, display, items):
+        raise NotImplementedError
+
+    def create_stimulus(self, canvas):
+        # Crea un elemento vuoto del canvas e ne restituisce l'id
+        raise NotImplementedError
+
+    def update_stimulus(self, canvas, canvas_item, x, y, item, asset):
+        raise NotImplementedError
+
+    def grid_layout(self):
+        # GridLayout con cui la griglia finale viene disegnata come un'unica immagine
+        # composta dagli asset (immagini PIL), vedi atlas.py; None per usare un
+        # pulsante per stimolo con create_button e update_button
+        return None
+
+    def create_button(self, parent):
+        raise NotImplementedError
+
+    def update_button(self, button, item, asset):
+        raise NotImplementedError
+
+    def key_for(self, item):
+        # Tasto che seleziona lo stimolo nella griglia finale, se ne ha uno
+        return None
@@ -0,0 +1,175 @@
+import math
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+# Lati (in pixel) delle miniature quadrate della piramide: 100 è la dimensione su uno
+# schermo 1920x1080, le altre coprono schermi più piccoli e fino al 4K e oltre
+PYRAMID_LEVELS = (64, 100, 150, 200, 300, 400)
+
+
+class ThumbnailCache:
+    # Miniature già decodificate e ridimensionate, a più livelli di dimensione (una
+    # piramide). In memoria restano le ultime `max_items` usate (LRU), su disco ogni
+    # sorgente ha un PNG per livello in `cache_dir`. Quando manca un livello chi lo
+    # chiede aspetta solo quello, ricavato direttamente dalla sorgente; gli altri
+    # livelli vengono generati dopo, in background: cambiare livello (la finestra
+    # passa su un monitor con un'altra risoluzione) legge poi solo miniature già
+    # pronte, anche tra un avvio e l'altro. La chiave è percorso, mtime e
+    # dimensione del file: se la sorgente cambia le miniature vengono rigenerate. La
+    # sorgente può anche essere un'immagine dentro un pacchetto (packs.PackMember), che
+    # porta con sé chiave, impronta e il modo di aprirla.
+    # Gli altri livelli e i PNG sono prodotti da un thread a parte, che aspetta
+    # `idle_delay` secondi senza nuove miniature da generare: le miniature di un round
+    # non si contendono la CPU con il lavoro in background.
+    def __init__(self, cache_dir, levels=PYRAMID_LEVELS, max_items=256, idle_delay=0.1):
+        self.cache_dir = cache_dir
+        self.levels = tuple(sorted(levels))
+        self.max_items = max_items
+        self.idle_delay = idle_delay
+        self._last_miss = 0.0
+        self._memory = OrderedDict()
+        # La cache è usata sia dal thread di Tk sia da quello di prefetch
+        self._lock = threading.Lock()
+        self._pending = queue.Queue()
+        self._writer = None
+
+    def level_for(self, pixels):
+        # Il livello più vicino (in proporzione) al lato desiderato
+        return min(self.levels, key=lambda level: abs(math.log(level / pixels)))
+
+    def get(self, source, level=100):
+        if level not in self.levels:
+            level = self.level_for(level)
+        if isinstance(source, str):
+            path = os.path.abspath(source)
+            stat = os.stat(path)
+            stamp = f"{stat.st_mtime_ns}:{stat.st_size}"
+            opener = path
+        else:
+            path, stamp = source.key, source.stamp
+            opener = source.open
+        key = (path, stamp, level)
+
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+                return image
+
+        image = self._load_from_disk(self._disk_path(path, level), stamp)
+        if image is None:
+            self._last_miss = time.monotonic()
+            image = self._make_thumbnail(opener if isinstance(opener, str) else opener(), level)
+            self._write_later(path, stamp, opener, level, image)
+
+        with self._lock:
+            self._memory[key] = image
+            if len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+        return image
+
+    def flush(self):
+        # Aspetta che tutti i livelli delle miniature generate finora siano su disco
+        self._pending.join()
+
+    def _write_later(self, path, stamp, opener, level, image):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_pending, name="thumbnails", daemon=True)
+                self._writer.start()
+        self._pending.put((path, stamp, opener, level, image))
+
+    def _write_pending(self):
+        while True:
+            path, stamp, opener, level, image = self._pending.get()
+            while True:
+                wait = self._last_miss + self.idle_delay - time.monotonic()
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            try:
+                self._save_to_disk(self._disk_path(path, level), stamp, image)
+                others = [other for other in self.levels if other != level]
+                pyramid = self._make_pyramid(opener if isinstance(opener, str) else opener(), others) if others else {}
+                for other, thumbnail in pyramid.items():
+                    self._save_to_disk(self._disk_path(path, other), stamp, thumbnail)
+            except Exception:
+                # Sorgente sparita o rovinata nel frattempo: il livello chiesto è già
+                # stato restituito, gli altri verranno rigenerati quando serviranno
+                pass
+            finally:
+                self._pending.task_done()
+
+    # PIL e hashlib vengono importati al primo uso: la finestra si apre prima
+    # e l'esercizio con le immagini paga il costo solo quando decodifica la prima miniatura
+    def _disk_path(self, path, level):
+        import hashlib
+
+        name = hashlib.sha1(f"{path}|{level}x{level}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name + ".png")
+
+    def _load_from_disk(self, disk_path, stamp):
+        from PIL import Image
+
+        try:
+            with Image.open(disk_path) as stored:
+                if stored.text.get("source") != stamp:
+                    return None
+                stored.load()
+                return stored
+        except (OSError, SyntaxError):
+            return None
+
+    # `file` è un percorso o un file già aperto. I JPEG vengono decodificati
+    # direttamente a una risoluzione di poco superiore al livello più grande richiesto
+    def _open_source(self, file, largest):
+        from PIL import Image
+
+        source = Image.open(file)
+        source.draft(source.mode, (largest, largest))
+        if source.mode not in ("RGB", "RGBA", "L", "LA"):
+            with source:
+                return source.convert("RGBA")
+        source.load()
+        return source
+
+    def _make_thumbnail(self, file, level):
+        # Il solo livello richiesto, dalla sorgente: è quello che il chiamante aspetta
+        from PIL import Image
+
+        with self._open_source(file, level) as source:
+            return source.resize((level, level), Image.LANCZOS)
+
+    def _make_pyramid(self, file, levels):
+        # Una sola decodifica per tutti i livelli indicati; ognuno è ricavato dal
+        # precedente, più grande, invece che dalla sorgente
+        from PIL import Image
+
+        levels = sorted(levels, reverse=True)
+        pyramid = {}
+        with self._open_source(file, levels[0]) as source:
+            image = source
+            for level in levels:
+                image = pyramid[level] = image.resize((level, level), Image.LANCZOS)
+        return pyramid
+
+    def _save_to_disk(self, disk_path, stamp, image):
+        # Scrive su un file temporaneo e lo rinomina, così una miniatura a metà non
+        # finisce mai nella cache; se la cartella non è scrivibile si lavora solo in memoria
+        from PIL import PngImagePlugin
+
+        info = PngImagePlugin.PngInfo()
+        info.add_text("source", stamp)
+        tmp_path = f"{disk_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            image.save(tmp_path, "PNG", pnginfo=info)
+            os.replace(tmp_path, disk_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,63 @@
+import sys
+import time
+
+
+class ScreenTransition:
+    # Misure di un cambio di schermata, passate ai listener di MemoryApp:
+    # render_latency sono i secondi tra la richiesta e il primo frame disegnato,
+    # timer_jitter il ritardo del timer che l'ha provocata (None se non c'era un timer)
+    __slots__ = ("screen", "render_latency", "timer_jitter")
+
+    def __init__(self, screen, render_latency, timer_jitter=None):
+        self.screen = screen
+        self.render_latency = render_latency
+        self.timer_jitter = timer_jitter
+
+
+def log_transition(transition, file=None):
+    # Listener pronto all'uso, attivato da VISION_TIMING_LOG: una riga per transizione
+    file = sys.stderr if file is None else file
+    line = f"{transition.screen:<8} render {transition.render_latency * 1000:7.2f} ms"
+    if transition.timer_jitter is not None:
+        line += f"  jitter {transition.timer_jitter * 1000:+6.2f} ms"
+    print(line, file=file)
+
+
+class ExposureTimer:
+    # Chiama `on_expired(timer)` quando sono passati `duration` secondi da start(), da
+    # chiamare subito dopo il primo frame degli stimoli. Tk arrotonda i timer al
+    # millisecondo per difetto e li esegue quando il mainloop è libero: il timer si
+    # riprogramma finché la scadenza non è passata (nell'ultimo millisecondo con
+    # after(0)), poi registra in `jitter` di quanto è scattato in ritardo.
+    def __init__(self, root, duration, on_expired, slack=0.0):
+        self.root = root
+        self.duration = duration
+        self.on_expired = on_expired
+        self.slack = slack
+        self.started_at = None
+        self.deadline = None
+        self.jitter = None
+        self._after_id = None
+
+    def start(self, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.deadline = self.started_at + self.duration
+        self._schedule()
+
+    def _schedule(self):
+        remaining = self.deadline - time.perf_counter()
+        self._after_id = self.root.after(max(0, int(remaining * 1000)), self._tick)
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self.deadline - now > self.slack:
+            self._schedule()
+            return
+        self._after_id = None
+        self.jitter = now - self.deadline
+        self.on_expired(self)
+
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
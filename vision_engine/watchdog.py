@@ -0,0 +1,235 @@
+import json
+import os
+import sys
+import threading
+import time
+import tkinter as tk
+import traceback
+from array import array
+from collections import deque
+
+# Un frame a 60 Hz: una callback più lunga blocca il ridisegno della finestra
+FRAME_BUDGET_MS = float(os.environ.get("VISION_FRAME_BUDGET_MS", 1000 / 60))
+# Limiti in millisecondi delle colonne dell'istogramma
+HISTOGRAM_BOUNDS = (1, 2, 4, 8, 16, 33, 66, 133, 266, 533, 1066)
+
+
+def callback_name(func):
+    # Nome leggibile di una callback Tk. after() registra una funzione `callit` che
+    # chiama quella vera: il nome è quello della funzione che avvolge
+    code = getattr(func, "__code__", None)
+    if code is not None and code.co_name == "callit" and "func" in code.co_freevars:
+        func = func.__closure__[code.co_freevars.index("func")].cell_contents
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    module = getattr(func, "__module__", None)
+    return f"{module}.{name}" if module and module != "__main__" else name
+
+
+class Stall:
+    __slots__ = ("name", "started", "duration", "stack")
+
+    def __init__(self, name, started, duration=None, stack=None):
+        self.name = name
+        self.started = started
+        self.duration = duration  # None finché la callback non è finita
+        self.stack = stack  # dove si trovava il thread di Tk quando il watchdog l'ha visto fermo
+
+
+class TkProfiler:
+    # Misura la durata di ogni callback chiamata da Tk (command dei widget, bind,
+    # after e after_idle) sostituendo tkinter.CallWrapper.__call__, da cui passano
+    # tutte. Le durate finiscono in un buffer circolare di array preallocati (le ultime
+    # `capacity`), quindi il costo per callback è di due perf_counter e qualche
+    # assegnamento. Un thread watchdog controlla ogni mezzo frame se il thread di Tk è
+    # fermo nella stessa callback da più di `budget_ms`: in quel caso ne cattura lo
+    # stack con sys._current_frames, che mostra dove si è bloccato e non solo chi.
+    # Va installato prima di creare i widget: Tk conserva il metodo __call__ di ogni
+    # comando registrato.
+    def __init__(self, budget_ms=FRAME_BUDGET_MS, capacity=65536, max_stalls=256):
+        self.budget = budget_ms / 1000
+        self.capacity = capacity
+        self.started = array("d", bytes(8 * capacity))
+        self.durations = array("d", bytes(8 * capacity))
+        self.name_ids = array("i", bytes(4 * capacity))
+        self.depths = array("b", bytes(capacity))
+        self.count = 0
+        self.names = []
+        self._name_ids = {}
+        self.stalls = deque(maxlen=max_stalls)
+        self._stack = []  # callback in corso sul thread di Tk (possono annidarsi)
+        self._watched = None  # (token, nome, inizio) della callback più esterna in corso
+        self._token = 0
+        self._seen = None
+        self._lock = threading.Lock()
+        self._original = None
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._watchdog = None
+
+    def install(self):
+        if self._original is not None:
+            return self
+        self._thread_id = threading.get_ident()
+        self._original = original = tk.CallWrapper.__call__
+        profiler = self
+
+        def timed_call(wrapper, *args):
+            name_id = getattr(wrapper, "_profile_name_id", None)
+            if name_id is None:
+                name_id = wrapper._profile_name_id = profiler._name_id(callback_name(wrapper.func))
+            started = time.perf_counter()
+            profiler._enter(name_id, started)
+            try:
+                return original(wrapper, *args)
+            finally:
+                profiler._leave(name_id, started, time.perf_counter())
+
+        tk.CallWrapper.__call__ = timed_call
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="tk-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def uninstall(self):
+        if self._original is not None:
+            tk.CallWrapper.__call__ = self._original
+            self._original = None
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def _enter(self, name_id, started):
+        if not self._stack:
+            self._token += 1
+            self._watched = (self._token, name_id, started)
+        self._stack.append(name_id)
+
+    def _leave(self, name_id, started, finished):
+        self._stack.pop()
+        depth = len(self._stack)
+        duration = finished - started
+        slot = self.count % self.capacity
+        self.started[slot] = started
+        self.durations[slot] = duration
+        self.name_ids[slot] = name_id
+        self.depths[slot] = min(depth, 127)
+        self.count += 1
+        if depth:
+            return
+        watched = self._watched
+        self._watched = None
+        if duration > self.budget:
+            with self._lock:
+                if self._seen is not None and self._seen[0] == watched[0]:
+                    self._seen[1].duration = duration
+                else:
+                    self.stalls.append(Stall(self.names[name_id], started, duration))
+
+    def _watch(self):
+        interval = max(self.budget / 2, 0.001)
+        while not self._stop.wait(interval):
+            watched = self._watched
+            if watched is None or time.perf_counter() - watched[2] <= self.budget:
+                continue
+            token, name_id, started = watched
+            if self._seen is not None and self._seen[0] == token:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = traceback.format_stack(frame) if frame is not None else None
+            del frame
+            with self._lock:
+                # La callback può essere finita mentre si catturava lo stack
+                if self._watched is not None and self._watched[0] == token:
+                    stall = Stall(self.names[name_id], started, stack=stack)
+                    self.stalls.append(stall)
+                    self._seen = (token, stall)
+
+    def events(self):
+        # (inizio, durata, nome, profondità) delle callback nel buffer, dalla più vecchia
+        first = max(0, self.count - self.capacity)
+        for index in range(first, self.count):
+            slot = index % self.capacity
+            yield (self.started[slot], self.durations[slot],
+                   self.names[self.name_ids[slot]], self.depths[slot])
+
+    def summary(self):
+        # Per callback: numero di chiamate, tempo totale, mediana, p99 e massimo in
+        # secondi, in ordine di tempo totale; più l'istogramma di tutte le durate
+        by_name = {}
+        histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for _, duration, name, _ in self.events():
+            by_name.setdefault(name, []).append(duration)
+            milliseconds = duration * 1000
+            column = 0
+            while column < len(HISTOGRAM_BOUNDS) and milliseconds >= HISTOGRAM_BOUNDS[column]:
+                column += 1
+            histogram[column] += 1
+        callbacks = []
+        for name, durations in by_name.items():
+            durations.sort()
+            callbacks.append({
+                "name": name,
+                "calls": len(durations),
+                "total": sum(durations),
+                "p50": durations[(len(durations) - 1) // 2],
+                "p99": durations[max(0, -(-len(durations) * 99 // 100) - 1)],
+                "max": durations[-1],
+            })
+        callbacks.sort(key=lambda entry: entry["total"], reverse=True)
+        return {"callbacks": callbacks, "histogram": histogram, "stalls": len(self.stalls),
+                "dropped": max(0, self.count - self.capacity)}
+
+    def format_summary(self, limit=15):
+        summary = self.summary()
+        lines = [f"Callback Tk: {self.count} chiamate, {summary['stalls']} oltre {self.budget * 1000:.1f} ms"]
+        lines.append(f"{'callback':<60} {'chiamate':>8} {'totale':>10} {'p50':>8} {'p99':>8} {'max':>8}")
+        for entry in summary["callbacks"][:limit]:
+            lines.append(f"{entry['name'][-60:]:<60} {entry['calls']:>8} {entry['total'] * 1000:>8.1f}ms "
+                         f"{entry['p50'] * 1000:>6.1f}ms {entry['p99'] * 1000:>6.1f}ms {entry['max'] * 1000:>6.1f}ms")
+        lines.append("Istogramma delle durate:")
+        total = max(1, sum(summary["histogram"]))
+        bounds = (0,) + HISTOGRAM_BOUNDS
+        for column, count in enumerate(summary["histogram"]):
+            label = f"{bounds[column]}-{HISTOGRAM_BOUNDS[column]} ms" if column < len(HISTOGRAM_BOUNDS) \
+                else f">= {HISTOGRAM_BOUNDS[-1]} ms"
+            lines.append(f"  {label:>14} {count:>8} {'#' * round(40 * count / total)}")
+        for stall in list(self.stalls)[-5:]:
+            duration = "in corso" if stall.duration is None else f"{stall.duration * 1000:.1f} ms"
+            lines.append(f"Blocco in {stall.name} ({duration})")
+            if stall.stack:
+                for entry in stall.stack[-4:]:
+                    lines.extend("    " + line for line in entry.rstrip().splitlines())
+        return "\n".join(lines)
+
+    def export_trace(self, path):
+        # Formato Trace Event (JSON) di Chrome, apribile con Perfetto o chrome://tracing:
+        # un evento per callback, i blocchi come eventi istantanei con lo stack
+        events = list(self.events())
+        origin = min((event[0] for event in events), default=0.0)
+        trace = [{"name": name, "cat": "tk", "ph": "X", "pid": 1, "tid": 1,
+                  "ts": round((started - origin) * 1e6, 1), "dur": round(duration * 1e6, 1),
+                  "args": {"depth": depth}}
+                 for started, duration, name, depth in events]
+        for stall in self.stalls:
+            trace.append({"name": f"blocco: {stall.name}", "cat": "stall", "ph": "i", "s": "t", "pid": 1, "tid": 1,
+                          "ts": round((stall.started - origin) * 1e6, 1),
+                          "args": {"duration_ms": None if stall.duration is None else stall.duration * 1000,
+                                   "stack": "".join(stall.stack or ())}})
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file)
+        os.replace(tmp_path, path)
+
+
+def profile_requested():
+    # VISION_PROFILE=1 stampa il riepilogo all'uscita, VISION_PROFILE=file.json
+    # salva anche la traccia
+    return os.environ.get("VISION_PROFILE") or None
@@ -0,0 +1,160 @@
+import asyncio
+import base64
+import hashlib
+import os
+import struct
+
+# Protocollo WebSocket (RFC 6455) su uno StreamReader/StreamWriter di asyncio: quanto
+# basta al server degli esercizi e al client del test di carico, senza dipendenze
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE = 1 << 20
+
+
+class WebSocketError(Exception):
+    pass
+
+
+def accept_key(key):
+    # Risposta all'header Sec-WebSocket-Key della richiesta di upgrade
+    return base64.b64encode(hashlib.sha1((key + GUID).encode("ascii")).digest()).decode("ascii")
+
+
+def _apply_mask(payload, key):
+    # XOR con la chiave ripetuta, fatto su un unico intero invece che byte per byte
+    length = len(payload)
+    if not length:
+        return b""
+    repeated = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")).to_bytes(length, "big")
+
+
+def encode_frame(opcode, payload, mask=False):
+    # I client devono mascherare i frame, il server non deve
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = _apply_mask(payload, key)
+    return bytes(header) + payload
+
+
+class WebSocket:
+    # Una connessione già aperta (handshake fatto). receive() restituisce il prossimo
+    # messaggio (str per i testi, bytes per i binari) o None quando la connessione si
+    # chiude; ping e frammenti vengono gestiti qui.
+    def __init__(self, reader, writer, mask=False, max_message=MAX_MESSAGE):
+        self.reader = reader
+        self.writer = writer
+        self.mask = mask
+        self.max_message = max_message
+        self.closed = False
+
+    async def receive(self):
+        opcode = None
+        parts = []
+        size = 0
+        while True:
+            try:
+                fin, frame_opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+            if frame_opcode == CLOSE:
+                await self._close(payload[:2] or struct.pack("!H", 1000))
+                return None
+            if frame_opcode == PING:
+                await self._send(PONG, payload)
+                continue
+            if frame_opcode == PONG:
+                continue
+            if frame_opcode != CONTINUATION:
+                opcode = frame_opcode
+            elif opcode is None:
+                raise WebSocketError("Frame di continuazione senza un messaggio iniziato")
+            size += len(payload)
+            if size > self.max_message:
+                await self._close(struct.pack("!H", 1009))
+                raise WebSocketError(f"Messaggio più grande di {self.max_message} byte")
+            parts.append(payload)
+            if fin:
+                message = b"".join(parts)
+                if opcode != TEXT:
+                    return message
+                try:
+                    return message.decode("utf-8")
+                except UnicodeDecodeError:
+                    # 1007: dati non coerenti con il tipo del messaggio (RFC 6455, 7.4.1)
+                    await self._close(struct.pack("!H", 1007))
+                    raise WebSocketError("Messaggio di testo non in UTF-8")
+
+    async def _read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", await self.reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", await self.reader.readexactly(8))
+        if length > self.max_message:
+            raise WebSocketError(f"Frame più grande di {self.max_message} byte")
+        key = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if key is not None:
+            payload = _apply_mask(payload, key)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def send(self, message):
+        if isinstance(message, str):
+            await self._send(TEXT, message.encode("utf-8"))
+        else:
+            await self._send(BINARY, message)
+
+    async def _send(self, opcode, payload):
+        if self.closed:
+            raise ConnectionError("WebSocket chiuso")
+        self.writer.write(encode_frame(opcode, payload, self.mask))
+        await self.writer.drain()
+
+    async def close(self, code=1000):
+        await self._close(struct.pack("!H", code))
+
+    async def _close(self, payload):
+        if self.closed:
+            return
+        try:
+            await self._send(CLOSE, payload)
+        except ConnectionError:
+            pass
+        self.closed = True
+
+
+async def connect(host, port, path="/ws"):
+    # Client: apre la connessione e fa l'handshake di upgrade
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    writer.write((
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        "Sec-WebSocket-Version: 13\r\n\r\n").encode("ascii"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status_line, *header_lines = head.split("\r\n")
+    headers = {name.strip().lower(): value.strip()
+               for name, _, value in (line.partition(":") for line in header_lines if line)}
+    if status_line.split(" ")[1:2] != ["101"] or headers.get("sec-websocket-accept") != accept_key(key):
+        writer.close()
+        raise WebSocketError(f"Handshake rifiutato: {status_line}")
+    return WebSocket(reader, writer, mask=True)